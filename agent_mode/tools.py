@@ -18,6 +18,9 @@ load_dotenv(env_path)
 
 USE_REAL_SEARCH = True
 
+# Whitespace-run pattern for fetch() text normalization, compiled once at import
+_WS_RE = re.compile(r'\s+')
+
 @tool
 def search(topic: str, limit: int):
     """
@@ -179,7 +182,7 @@ def fetch(url: str, timeout: int = 10) -> dict:
     for tag in soup(['script', 'style', 'nav', 'footer', 'header']):
         tag.decompose()
     raw_text = soup.get_text(separator=' ')
-    raw_text = re.sub(r'\\s+', ' ', raw_text).strip()
+    raw_text = _WS_RE.sub(' ', raw_text).strip()
     title_tag = soup.find('title')
     title = title_tag.get_text().strip() if title_tag else "No title"
     kind = "html"
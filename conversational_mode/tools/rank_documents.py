@@ -1,3 +1,4 @@
+import numpy as np
 from crewai.tools import tool
 
 @tool
@@ -67,15 +68,16 @@ def rank_documents(query: str, documents: list, text_key: str = "raw_text") -> l
         print("[WARNING] No valid documents to rank")
         return documents  # Return original if nothing to rank
     
-    # Get relevance scores from neural network
-    scores = rank_passages(query, passages)
+    # Get relevance scores from neural network as one contiguous array
+    scores = np.asarray(rank_passages(query, passages), dtype=np.float64).reshape(-1)
     
-    # Add scores to documents and sort by score
-    for i, doc in enumerate(valid_docs):
-        doc["score"] = scores[i]
-    
-    # Sort by score (highest first)
-    ranked_docs = sorted(valid_docs, key=lambda x: x["score"], reverse=True)
+    # Sort by score (highest first); ties keep their input order
+    order = np.argsort(-scores, kind="stable")
+    ranked_docs = []
+    for i in order:
+        doc = valid_docs[i]
+        doc["score"] = float(scores[i])  # Plain Python float, not a numpy scalar
+        ranked_docs.append(doc)
     
     # Add unranked error documents at the end (with debug info)
     # Only include documents that weren't already processed
@@ -1,5 +1,4 @@
 import requests
-import re
 from bs4 import BeautifulSoup
 from crewai.tools import tool
 
@@ -40,8 +39,8 @@ def fetch(url: str, timeout: int = 10) -> dict:
     soup = BeautifulSoup(response.text, 'html.parser')
     for tag in soup(['script', 'style', 'nav', 'footer', 'header']):
         tag.decompose()
-    raw_text = soup.get_text(separator=' ')
-    raw_text = re.sub(r'\s+', ' ', raw_text).strip()
+    # Text nodes joined word by word, with single spaces
+    raw_text = ' '.join(word for text in soup.stripped_strings for word in text.split())
     title_tag = soup.find('title')
     title = title_tag.get_text().strip() if title_tag else "No title"
     kind = "html"
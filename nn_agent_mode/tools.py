@@ -1,11 +1,24 @@
 ﻿import requests
-import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+try:
+    from lxml import etree as ET  # C parser; supports iterparse(tag=...)
+except ImportError:
+    import xml.etree.ElementTree as ET
 import os
-import json
 import re
+import json
+import hashlib
+import sqlite3
+import tempfile
+import threading
+import time
 from datetime import datetime
+import openai
 from openai import OpenAI
-from bs4 import BeautifulSoup
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
+from selectolax.parser import HTMLParser
+import numpy as np
 from pathlib import Path
 from dotenv import load_dotenv
 from crewai.tools import tool
@@ -18,6 +31,182 @@ load_dotenv(env_path)
 
 USE_REAL_SEARCH = True
 
+# Shared session: keep-alive connection pool reused by search() and fetch() (no new TCP/TLS handshake per paper)
+_SESSION = requests.Session()
+_SESSION.headers.update({'User-Agent': 'Mozilla/5.0 (compatible; workflow-bot)'})
+_ADAPTER = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=['GET']),
+)
+_SESSION.mount('http://', _ADAPTER)
+_SESSION.mount('https://', _ADAPTER)
+
+# On-disk cache of arXiv search results, one JSON file per (topic, limit); arXiv updates daily
+_SEARCH_CACHE_DIR = Path.home() / '.cache' / 'agentic_ai' / 'arxiv'
+ARXIV_CACHE_TTL = int(os.getenv('ARXIV_CACHE_TTL', 24 * 3600))
+
+# Summarization prompt, static prefix built once at import; summarize() only formats the title/text suffix
+# (kept apart so braces in the user-chosen topic inside the prompts are never read as format fields)
+_PROMPT_PREFIX = (
+    f"Your role is {role}"
+    f"Your goal is {goal}"
+    f"Your backstory is {backstory}"
+    f"Your task is {description}"
+    "Use EXACTLY this structure with these exact headers:\n\n"
+    "**Problem:** [description]\n"
+    "**Approach:** [description]\n"
+    "**Key Results:** [description]\n"
+    "**Why It Matters:** [description]\n\n"
+    "Keep each section to 30-50 words. Total 120-180 words.\n\n"
+)
+_PROMPT_SUFFIX = "Title: {title_guess}\n\n{raw_text}"
+
+# Fetched-page cache shared across sessions (and threads): SQLite in WAL mode, 7-day TTL per URL
+_FETCH_DB_PATH = Path.home() / '.cache' / 'agentic_ai' / 'fetch.sqlite'
+FETCH_CACHE_TTL = 7 * 24 * 3600
+_fetch_db = None
+_fetch_db_lock = threading.Lock()
+
+# arXiv PDF link -> abstract page (anchored to arXiv hosts so other sites' /pdf/ paths are left alone)
+_ARXIV_PDF_RE = re.compile(r'^(https?://(?:www\.|export\.)?arxiv\.org)/pdf/(.+?)(?:\.pdf)?$')
+
+# JSONL encoder for persist(): orjson (C, emits UTF-8 bytes) when installed, compact stdlib json otherwise
+try:
+    import orjson
+
+    def _jsonl_line(record: dict) -> bytes:
+        return orjson.dumps(record) + b"\n"
+except ImportError:
+    def _jsonl_line(record: dict) -> bytes:
+        return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode("utf-8")
+
+# OpenAI client shared across summarize() calls (one connection pool, reused keep-alive connections)
+_openai_client = None
+
+# Retry policy for chat completions: exponential backoff with jitter, only on transient errors
+# (rate limits, dropped connections, timeouts, server-side 5xx); other errors fail immediately
+_llm_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_random_exponential(multiplier=1, max=30),
+    retry=retry_if_exception_type((
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError,
+    )),
+    reraise=True,  # Surface the last OpenAI error instead of tenacity's RetryError
+)
+
+# rank_passages is resolved on first use: importing nn loads torch/transformers,
+# which search() and fetch() callers shouldn't have to pay for
+_rank_passages = None
+
+
+def _search_cache_path(topic: str, limit: int) -> Path:
+    """Cache file for a (topic, limit) search."""
+    return _SEARCH_CACHE_DIR / f"{hashlib.sha1(f'{topic}|{limit}'.encode()).hexdigest()}.json"
+
+
+def _read_search_cache(topic: str, limit: int) -> Optional[dict]:
+    """Return the cache entry {ts, results, etag, last_modified} for a search, fresh or not, or None."""
+    try:
+        with open(_search_cache_path(topic, limit), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_search_cache(topic: str, limit: int, results: list,
+                        etag: Optional[str] = None, last_modified: Optional[str] = None):
+    """Atomically write search results to the cache (temp file + os.replace, so readers never see a partial file)."""
+    try:
+        _SEARCH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=_SEARCH_CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"ts": time.time(), "results": results, "etag": etag, "last_modified": last_modified}, f)
+        os.replace(tmp_path, _search_cache_path(topic, limit))
+    except OSError as e:
+        print(f"[WARNING] Could not write arXiv search cache: {e}")
+
+
+def _get_fetch_db() -> sqlite3.Connection:
+    """Lazy open the fetch cache database (only open once). Caller must hold _fetch_db_lock."""
+    global _fetch_db
+    if _fetch_db is None:
+        _FETCH_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: autocommit, each INSERT is its own short transaction
+        _fetch_db = sqlite3.connect(str(_FETCH_DB_PATH), check_same_thread=False, isolation_level=None)
+        _fetch_db.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer
+        _fetch_db.execute(
+            "CREATE TABLE IF NOT EXISTS pages "
+            "(url TEXT PRIMARY KEY, ts INTEGER, title TEXT, raw_text TEXT, kind TEXT)"
+        )
+    return _fetch_db
+
+
+def _read_page_cache(url: str) -> Optional[dict]:
+    """Return the cached fetch() result for url if younger than FETCH_CACHE_TTL, else None."""
+    try:
+        with _fetch_db_lock:
+            row = _get_fetch_db().execute(
+                "SELECT title, raw_text, kind FROM pages WHERE url = ? AND ts > ?",
+                (url, int(time.time()) - FETCH_CACHE_TTL),
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    return {"title": row[0], "url": url, "raw_text": row[1], "kind": row[2]}
+
+
+def _write_page_cache(doc: dict):
+    """Store a successfully parsed fetch() result."""
+    try:
+        with _fetch_db_lock:
+            _get_fetch_db().execute(
+                "INSERT OR REPLACE INTO pages (url, ts, title, raw_text, kind) VALUES (?, ?, ?, ?, ?)",
+                (doc["url"], int(time.time()), doc["title"], doc["raw_text"], doc["kind"]),
+            )
+    except sqlite3.Error as e:
+        print(f"[WARNING] Could not write fetch cache: {e}")
+
+
+def _get_openai_client() -> OpenAI:
+    """Lazy create the shared OpenAI client (only create once)."""
+    global _openai_client
+    if _openai_client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment or .env file")
+        # Retries come from _llm_retry
+        _openai_client = OpenAI(api_key=api_key, max_retries=0)
+    return _openai_client
+
+
+@_llm_retry
+def _call_llm(client: OpenAI, prompt: str):
+    """Request one summary completion (retried with backoff on transient errors)."""
+    return client.chat.completions.create(
+        model="gpt-4.1-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.7,
+        max_tokens=300
+    )
+
+
+def _get_ranker():
+    """Lazy import rank_passages (only import once)."""
+    global _rank_passages
+    if _rank_passages is None:
+        # Works from both parent directory and nn_agent_mode directory
+        try:
+            from .nn import rank_passages
+        except ImportError:
+            from nn import rank_passages
+        _rank_passages = rank_passages
+    return _rank_passages
+
 @tool
 def search(topic: str, limit: int):
     """
@@ -40,6 +229,9 @@ def search(topic: str, limit: int):
     Note:
         Set USE_REAL_SEARCH = False to use mock data for testing without internet.
         The arXiv API is free and public - no API key required!
+        Results are cached on disk for ARXIV_CACHE_TTL seconds (env var, default 24 hours).
+        After that the query is revalidated with If-None-Match/If-Modified-Since, so an unchanged
+        result set costs a headers-only 304 response instead of a full download and parse.
     """
     if not USE_REAL_SEARCH:
         return [
@@ -47,23 +239,54 @@ def search(topic: str, limit: int):
             {"title": "Scaling Laws for Vision-Language Models", "url": "https://arxiv.org/abs/2406.67890", "source": "mock"},
             {"title": "Agentic AI: From Tools to Autonomous Systems", "url": "https://arxiv.org/abs/2407.11111", "source": "mock"}
         ]
+    cached = _read_search_cache(topic, limit)
+    if cached is not None and time.time() - cached.get('ts', 0) < ARXIV_CACHE_TTL:
+        print(f"[CACHE] Using cached arXiv results for: {topic}")
+        return cached['results']
+    # Stale entry: ask arXiv whether the results changed since we stored them
+    conditional_headers = {}
+    if cached is not None:
+        if cached.get('etag'):
+            conditional_headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            conditional_headers['If-Modified-Since'] = cached['last_modified']
     try:
         arxiv_url = "http://export.arxiv.org/api/query"
         params = {"search_query": f"all:{topic}", "start": 0, "max_results": limit}
-        headers = {'User-Agent': 'Mozilla/5.0 (compatible; workflow-bot)'}
         print(f"Searching arXiv for: {topic}")
-        response = requests.get(arxiv_url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        root = ET.fromstring(response.content)
-        ns = {'atom': 'http://www.w3.org/2005/Atom'}
-        results = []
-        for entry in root.findall('atom:entry', ns):
-            title = entry.find('atom:title', ns).text.strip()
-            paper_id = entry.find('atom:id', ns).text.split('/')[-1]
-            url = f"https://arxiv.org/abs/{paper_id}"
-            results.append({"title": title, "url": url, "source": "arxiv", "id": paper_id})
+        # The with-block releases the pooled connection even if the status check or parsing raises
+        with _SESSION.get(arxiv_url, params=params, headers=conditional_headers, timeout=10, stream=True) as response:
+            if response.status_code == 304:
+                # Not modified: reuse the cached results and restart their TTL
+                print(f"[CACHE] arXiv results unchanged for: {topic}")
+                _write_search_cache(topic, limit, cached['results'], cached.get('etag'), cached.get('last_modified'))
+                return cached['results']
+            response.raise_for_status()
+            response.raw.decode_content = True
+            # Stream <entry> elements off the socket instead of building the whole tree first
+            atom = '{http://www.w3.org/2005/Atom}'
+            entry_tag = atom + 'entry'
+            if hasattr(ET, 'LXML_VERSION'):
+                entries = ET.iterparse(response.raw, events=('end',), tag=entry_tag)
+            else:
+                entries = ET.iterparse(response.raw, events=('end',))
+            results = []
+            for _, entry in entries:
+                if entry.tag != entry_tag:
+                    continue
+                title = entry.findtext(atom + 'title', '').strip()
+                paper_id = entry.findtext(atom + 'id', '').split('/')[-1]
+                url = f"https://arxiv.org/abs/{paper_id}"
+                results.append({"title": title, "url": url, "source": "arxiv", "id": paper_id})
+                # Free the finished entry (and, with lxml, its already-processed siblings)
+                entry.clear()
+                if hasattr(entry, 'getprevious'):
+                    while entry.getprevious() is not None:
+                        del entry.getparent()[0]
         if results:
             print(f"[OK] Found {len(results)} papers from arXiv")
+            _write_search_cache(topic, limit, results,
+                                response.headers.get('ETag'), response.headers.get('Last-Modified'))
             return results
         else:
             return [{"title": "No arXiv results found", "url": "", "source": "arxiv"}]
@@ -96,50 +319,20 @@ def summarize(raw_text: str, title_guess: str = "Untitled") -> dict:
         
     Note:
         The function truncates input text to 6000 characters to manage token costs.
-        It automatically retries once on API failures before giving up.
+        Transient API errors (rate limits, timeouts, connection drops, 5xx) are retried
+        up to 5 attempts with jittered exponential backoff; a final failure is returned
+        as an "Error summarizing: ..." summary.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment or .env file")
-    client = OpenAI(api_key=api_key)
-    prompt = (
-        f"Your role is {role}" +
-        f"Your goal is {goal}" +
-        f"Your backstory is {backstory}" +
-        f"Your task is {description}"
-        f"Use EXACTLY this structure with these exact headers:\\n\\n" +
-        f"**Problem:** [description]\\n" +
-        f"**Approach:** [description]\\n" +
-        f"**Key Results:** [description]\\n" +
-        f"**Why It Matters:** [description]\\n\\n" +
-        f"Keep each section to 30-50 words. Total 120180 words.\\n\\n" +
-        f"Title: {title_guess}\\n\\n{raw_text[:6000]}"
-    )
+    client = _get_openai_client()
+    prompt = _PROMPT_PREFIX + _PROMPT_SUFFIX.format(title_guess=title_guess, raw_text=raw_text[:6000])
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=300
-        )
-        summary = response.choices[0].message.content.strip()
-        tokens_in = response.usage.prompt_tokens
-        tokens_out = response.usage.completion_tokens
-        return {"title": title_guess, "summary": summary, "tokens_in": tokens_in, "tokens_out": tokens_out}
+        response = _call_llm(client, prompt)
     except Exception as e:
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=300
-            )
-            summary = response.choices[0].message.content.strip()
-            tokens_in = response.usage.prompt_tokens
-            tokens_out = response.usage.completion_tokens
-            return {"title": title_guess, "summary": summary, "tokens_in": tokens_in, "tokens_out": tokens_out}
-        except:
-            return {"title": title_guess, "summary": "Error summarizing: " + str(e), "tokens_in": 0, "tokens_out": 0}
+        return {"title": title_guess, "summary": "Error summarizing: " + str(e), "tokens_in": 0, "tokens_out": 0}
+    summary = response.choices[0].message.content.strip()
+    tokens_in = response.usage.prompt_tokens
+    tokens_out = response.usage.completion_tokens
+    return {"title": title_guess, "summary": summary, "tokens_in": tokens_in, "tokens_out": tokens_out}
 
 @tool
 def fetch(url: str, timeout: int = 10) -> dict:
@@ -163,29 +356,42 @@ def fetch(url: str, timeout: int = 10) -> dict:
             - error (str): Error message (only present if kind="error")
             
     Note:
-        PDF URLs are automatically converted to abstract page URLs.
+        arXiv PDF URLs are automatically converted to abstract page URLs;
+        other PDFs return an error dict.
         Scripts, styles, and navigation elements are stripped from HTML.
+        Parsed pages are cached in SQLite for FETCH_CACHE_TTL seconds (7 days).
     """
-    headers = {'User-Agent': 'Mozilla/5.0 (compatible; workflow-bot)'}
+    # arXiv PDF links are rewritten to the abstract page before the cache lookup (no recursion)
+    if 'arxiv.org/pdf/' in url:
+        url = _ARXIV_PDF_RE.sub(r'\1/abs/\2', url)
+    # Other PDFs can't be parsed as HTML; skip the download entirely
+    if url.lower().endswith('.pdf'):
+        return {"title": "Error", "url": url, "raw_text": "", "kind": "error", "error": "PDF content is not supported"}
+    cached = _read_page_cache(url)
+    if cached is not None:
+        return cached
     try:
-        response = requests.get(url, headers=headers, timeout=timeout)
+        response = _SESSION.get(url, timeout=timeout)
         response.raise_for_status()
     except Exception as e:
         return {"title": "Error", "url": url, "raw_text": "", "kind": "error", "error": str(e)}
-    if url.endswith('.pdf') or 'pdf' in response.headers.get('Content-Type', ''):
-        abs_url = url.replace('/pdf/', '/abs/').replace('.pdf', '')
-        return fetch(abs_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    for tag in soup(['script', 'style', 'nav', 'footer', 'header']):
-        tag.decompose()
-    raw_text = soup.get_text(separator=' ')
-    raw_text = re.sub(r'\\s+', ' ', raw_text).strip()
-    title_tag = soup.find('title')
-    title = title_tag.get_text().strip() if title_tag else "No title"
+    if 'pdf' in response.headers.get('Content-Type', ''):
+        return {"title": "Error", "url": url, "raw_text": "", "kind": "error", "error": "PDF content is not supported"}
+    # selectolax (C parser) is several times faster than BeautifulSoup for plain text extraction
+    tree = HTMLParser(response.text)
+    title_node = tree.css_first('title')
+    title = title_node.text().strip() if title_node else "No title"
+    for selector in ('script', 'style', 'nav', 'footer', 'header'):
+        for node in tree.css(selector):
+            node.decompose()
+    root = tree.body if tree.body is not None else tree.root
+    raw_text = ' '.join(root.text(separator=' ').split()) if root is not None else ""
     kind = "html"
     if 'arxiv.org/abs/' in url:
         kind = "arxiv_abs"
-    return {"title": title.split('|')[0].strip(), "url": url, "raw_text": raw_text, "kind": kind}
+    doc = {"title": title.split('|')[0].strip(), "url": url, "raw_text": raw_text, "kind": kind}
+    _write_page_cache(doc)
+    return doc
 
 @tool
 def persist(results: list, folder: Optional[str] = None):
@@ -224,18 +430,13 @@ def persist(results: list, folder: Optional[str] = None):
     os.makedirs(folder, exist_ok=True)
     
     md_path = os.path.join(folder, f"report_{timestamp}.md")
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(f"# Weekly AI Paper Brief – {timestamp}\n\n")
-        for i, r in enumerate(results, 1):
-            f.write(f"### {i}) {r['title']}\n")
-            f.write(f"{r['url']}\n\n")
-            f.write(f"{r['summary']}\n\n")
-            f.write("---\n\n")
-    
     jsonl_path = os.path.join(folder, f"runs_{timestamp}.jsonl")
-    with open(jsonl_path, "w", encoding="utf-8") as f:
-        for r in results:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    # One pass over results writes both files (JSONL as UTF-8 bytes)
+    with open(md_path, "w", encoding="utf-8") as md, open(jsonl_path, "wb") as jsonl:
+        md.write(f"# Weekly AI Paper Brief – {timestamp}\n\n")
+        for i, r in enumerate(results, 1):
+            md.write(f"### {i}) {r['title']}\n{r['url']}\n\n{r['summary']}\n\n---\n\n")
+            jsonl.write(_jsonl_line(r))
     print(f"Saved report: {md_path}")
     print(f"Saved raw data: {jsonl_path}")
 
@@ -268,32 +469,35 @@ def rank_documents(query: str, documents: list, text_key: str = "raw_text") -> l
         ranked = rank_documents("Agentic AI", fetched)
         # ranked[0] is the most relevant paper
     """
-    # Import rank_passages - works from both parent directory and nn_mode directory
-    try:
-        from .nn import rank_passages
-    except ImportError:
-        from nn import rank_passages
+    rank_passages = _get_ranker()
     
-    # Extract text passages from documents
+    # Extract text passages from documents, bucketing unrankable ones in the same pass
     passages = []
     valid_docs = []
+    error_docs = []
     
     for doc in documents:
-        # Skip error documents
         if doc.get("kind") == "error":
+            # Error documents get score of 0.0 and go at the end
+            doc["score"] = 0.0
+            doc["_debug"] = "Error fetching document"
+            error_docs.append(doc)
             continue
         
         # Check if text exists and is not empty/whitespace
-        text = doc.get(text_key, "")
-        if not text or not text.strip():
+        text = doc.get(text_key) or ""
+        if not text.strip():
+            # Document has no text - assign score of 0 and add debug info
+            doc["score"] = 0.0
+            doc["_debug"] = "No text content available for ranking"
+            error_docs.append(doc)
             continue
         
         # Truncate very long texts to avoid token limits (E5 max is 512 tokens)
-        # Rough estimate: ~4 chars per token, so 512 tokens ≈ 2000 chars
-        if len(text) > 2000:
-            text = text[:2000] + "..."
-        
-        passages.append(text)
+        # Rough estimate: ~4 chars per token; 1600 chars ≈ 400 tokens leaves headroom under 512
+        # and keeps the encoder's quadratic attention cost down
+        # (slicing a shorter string returns it unchanged, so no copy is made for short texts)
+        passages.append(text[:1600])
         valid_docs.append(doc)
     
     if not passages:
@@ -303,37 +507,15 @@ def rank_documents(query: str, documents: list, text_key: str = "raw_text") -> l
     # Get relevance scores from neural network
     scores = rank_passages(query, passages)
     
-    # Add scores to documents and sort by score
-    for i, doc in enumerate(valid_docs):
-        doc["score"] = scores[i]
+    # Add scores to documents as plain Python floats
+    for doc, score in zip(valid_docs, scores):
+        doc["score"] = float(score)
     
-    # Sort by score (highest first)
-    ranked_docs = sorted(valid_docs, key=lambda x: x["score"], reverse=True)
+    # Sort by score (highest first); ties keep their input order
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    ranked_docs = [valid_docs[i] for i in order]
     
     # Add unranked error documents at the end (with debug info)
-    # Only include documents that weren't already processed
-    processed_urls = {doc.get("url") for doc in valid_docs}
-    error_docs = []
-    for doc in documents:
-        # Skip if already processed
-        if doc.get("url") in processed_urls:
-            continue
-            
-        # Check if this document should have been processed but wasn't
-        text = doc.get(text_key, "")
-        has_text = text and text.strip()
-        
-        if doc.get("kind") == "error":
-            # Error documents get score of 0.0
-            doc["score"] = 0.0
-            doc["_debug"] = "Error fetching document"
-            error_docs.append(doc)
-        elif not has_text:
-            # Document has no text - assign score of 0 and add debug info
-            doc["score"] = 0.0
-            doc["_debug"] = "No text content available for ranking"
-            error_docs.append(doc)
-    
     ranked_docs.extend(error_docs)
     
     if error_docs:
@@ -0,0 +1,35 @@
+"""
+Shared sentence-transformers loader for the E5 embedding model.
+
+Loading the model takes seconds (plus a GPU upload), so every caller goes
+through get_model() and the instance is built once per process.
+"""
+
+import functools
+import torch
+from sentence_transformers import SentenceTransformer
+
+
+def _pick_device() -> str:
+    """Best available torch device: CUDA, then Apple MPS, then CPU."""
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+@functools.lru_cache(maxsize=1)
+def get_model(name: str = "intfloat/e5-base-v2") -> SentenceTransformer:
+    """
+    Load a SentenceTransformer model once and return the cached instance afterwards.
+
+    Args:
+        name (str): Hugging Face model name. Default: "intfloat/e5-base-v2"
+
+    Returns:
+        SentenceTransformer: The model, placed on the best available device
+    """
+    device = _pick_device()
+    print(f"Loading model {name} on {device}...")
+    return SentenceTransformer(name, device=device)
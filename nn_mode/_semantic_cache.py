@@ -0,0 +1,152 @@
+"""
+Shared on-disk store behind the nn_mode and workflow_mode semantic summary caches.
+
+Both caches keep normalized embeddings in an (N, dim) float32 matrix next to a
+row-aligned list of JSON entries. On disk the store only grows by appends: new
+rows go to a raw journal beside the compacted .npy matrix (folded into it every
+`compact_rows` rows), and entries to a JSONL sidecar. Crash recovery and
+compaction live here so the two modes can't drift apart.
+"""
+
+import os
+import threading
+from pathlib import Path
+import numpy as np
+import orjson
+
+
+class SemanticStore:
+    """
+    Embedding matrix plus row-aligned entries, persisted as .npy + journal + JSONL sidecar.
+
+    Scoring is left to the caller: hold `lock`, call load(), and read the matrix/entries it returns.
+
+    Args:
+        emb_path (Path): Compacted .npy matrix
+        log_path (Path): Raw journal of rows appended since the last compaction
+        meta_path (Path): JSONL sidecar, one entry per matrix row
+        dtype: On-disk dtype of the matrix and journal (rows are widened to float32 in memory)
+        compact_rows (int): Journal rows that trigger a compaction into the .npy
+    """
+
+    def __init__(self, emb_path: Path, log_path: Path, meta_path: Path, dtype=np.float32, compact_rows: int = 256):
+        self.emb_path = emb_path
+        self.log_path = log_path
+        self.meta_path = meta_path
+        self.dtype = np.dtype(dtype)
+        self.compact_rows = compact_rows
+        self.lock = threading.Lock()
+        self._matrix = None    # (N, dim) float32 view of _buffer, None until the first entry
+        self._entries = None   # Row-aligned entries, None until loaded
+        self._buffer = None    # Preallocated rows behind _matrix (grown by doubling, not per entry)
+        self._pending = 0      # Rows in the journal file
+        self._dirty = False    # Files on disk don't match memory (missing or torn): compact on the next store
+
+    def load(self) -> tuple:
+        """(matrix or None, entries), read from disk on first use. Caller must hold `lock`."""
+        if self._entries is not None:
+            return self._matrix, self._entries
+
+        self._matrix, self._entries, self._buffer, self._pending = None, [], None, 0
+        if not (self.emb_path.exists() and self.meta_path.exists()):
+            # Nothing usable (first run, or a leftover file from an older layout): the next store rewrites it all
+            self._dirty = True
+            return self._matrix, self._entries
+        try:
+            matrix, entries, pending = self._read()
+        except Exception as e:
+            # Unreadable (corrupt .npy, dimension mismatch, ...): start empty and rewrite it all on the next store
+            print(f"[WARN] Semantic cache unreadable, starting a new one: {e}")
+            self._dirty = True
+            return self._matrix, self._entries
+
+        # A crash mid-store (or mid-compaction) can leave extra rows or entries on one side:
+        # keep the aligned prefix, and rewrite both files on the next store so appends line up again
+        n = min(len(matrix), len(entries))
+        self._dirty = n != len(matrix) or n != len(entries)
+        self._pending = pending
+        self._entries = entries[:n]
+        if n:
+            self._buffer = matrix[:n]
+            self._matrix = self._buffer
+        return self._matrix, self._entries
+
+    def _read(self) -> tuple:
+        """(float32 matrix, entries, journal rows) as found on disk, before alignment."""
+        base = np.load(self.emb_path)
+        rows = [base]
+        pending = 0
+        if self.log_path.exists():
+            journal = np.fromfile(self.log_path, dtype=self.dtype)
+            pending = len(journal) // base.shape[1]   # A torn last row is dropped
+            rows.append(journal[:pending * base.shape[1]].reshape(-1, base.shape[1]))
+        # Widened once on load: NumPy has no BLAS path for float16, so scoring a float16
+        # matrix is an order of magnitude slower than the float32 matrix-vector product
+        matrix = np.concatenate(rows).astype(np.float32)
+
+        entries = []
+        with open(self.meta_path, "rb") as f:
+            for line in f:
+                try:
+                    entries.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    break  # A torn last line from an interrupted append
+        return matrix, entries, pending
+
+    def reset(self):
+        """Forget the in-memory copy so the next load() rereads disk. Caller must hold `lock`."""
+        self._entries = None
+
+    def store(self, embedding: np.ndarray, entry: dict):
+        """
+        Add a row and its entry, appending both to disk (a compaction every `compact_rows` rows).
+
+        Never raises: a failed store (full disk, unreadable cache, ...) is logged and skipped, and
+        the in-memory copy is dropped so the next load() trims disk back to its aligned prefix.
+        """
+        with self.lock:
+            try:
+                _, entries = self.load()
+                self._append_row(embedding)
+                entries.append(entry)
+                self.emb_path.parent.mkdir(parents=True, exist_ok=True)
+                if self._dirty:
+                    self._compact()  # Rewrites the matrix and the sidecar, new entry included
+                    return
+
+                # Row first, then its sidecar line: an interrupted store leaves an extra row, which load trims
+                if self._pending >= self.compact_rows:
+                    self._compact()  # Folds the journal and the new row into the .npy
+                else:
+                    with open(self.log_path, "ab") as f:
+                        f.write(embedding.astype(self.dtype).tobytes())
+                    self._pending += 1
+                # The sidecar is append-only: one line per matrix row
+                with open(self.meta_path, "ab") as f:
+                    f.write(orjson.dumps(entry) + b"\n")
+            except Exception as e:
+                self.reset()
+                print(f"[WARN] Semantic cache store failed, skipping it: {e}")
+
+    def _append_row(self, embedding: np.ndarray):
+        """Add a row to the in-memory matrix, growing its buffer by doubling. Caller must hold `lock`."""
+        n = 0 if self._matrix is None else len(self._matrix)
+        if self._buffer is None or n == len(self._buffer):
+            grown = np.empty((max(64, 2 * n), len(embedding)), dtype=np.float32)
+            if n:
+                grown[:n] = self._matrix
+            self._buffer = grown
+        self._buffer[n] = embedding
+        self._matrix = self._buffer[:n + 1]
+
+    def _compact(self):
+        """Rewrite the .npy matrix (and a dirty sidecar) from memory, empty the journal. Caller must hold `lock`."""
+        tmp = self.emb_path.with_suffix('.tmp.npy')
+        np.save(tmp, self._matrix.astype(self.dtype))
+        os.replace(tmp, self.emb_path)
+        self.log_path.unlink(missing_ok=True)
+        if self._dirty:
+            tmp = self.meta_path.with_suffix('.tmp')
+            tmp.write_bytes(b"".join(orjson.dumps(entry) + b"\n" for entry in self._entries))
+            os.replace(tmp, self.meta_path)
+        self._pending, self._dirty = 0, False
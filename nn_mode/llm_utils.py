@@ -0,0 +1,418 @@
+"""
+Shared LLM summarization and result persistence for nn_mode.
+
+summarize() and persist() are used by both tools.py (re-exported for the
+search -> fetch -> rank pipeline) and test_ranking.py, so every change to
+caching, client reuse, or output format lands in one place.
+"""
+
+# Import required libraries
+import openai                             # OpenAI error types (retry policy)
+from openai import OpenAI, AsyncOpenAI    # OpenAI Python SDK for LLM API calls (sync and async clients)
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type  # Backoff retries
+import asyncio                            # Concurrent summaries in summarize_many()
+import weakref                            # Per-event-loop AsyncOpenAI clients
+import httpx                              # HTTP client used under the OpenAI SDK (connection pool limits)
+import os                                 # Environment variable access and file operations
+from datetime import datetime             # Timestamps for output filenames
+from pathlib import Path                  # Path manipulation
+from dotenv import load_dotenv            # Load .env file for configuration
+import sys                                # For detecting caller's file location (sys._getframe)
+import hashlib                            # Hashing prompts into cache keys
+import diskcache                          # Persistent on-disk cache for LLM summaries
+import numpy as np                        # Semantic cache similarity search
+import orjson                             # Fast JSON serialization for the JSONL output
+
+try:
+    from ._semantic_cache import SemanticStore  # Journal/compaction store shared with workflow_mode
+except ImportError:
+    from _semantic_cache import SemanticStore
+
+# Load environment variables from .env file in project root
+env_path = Path(__file__).parent.parent / '.env'
+load_dotenv(env_path)
+
+# Summarization settings (part of the summary cache key)
+SUMMARY_MODEL = "gpt-4o-mini"
+SUMMARY_TEMPERATURE = 0.7
+SUMMARY_MAX_TOKENS = 300
+
+# Persistent cache of LLM summaries, opened lazily on first summarize() call
+_SUMMARY_CACHE_DIR = Path(__file__).parent / '.summary_cache'
+_summary_cache = None
+
+# Semantic summary cache: E5 embeddings of past inputs plus their summaries
+# Catches re-fetched papers whose text differs only by HTML noise (exact-key cache misses those).
+# E5 cosine scores sit in a compressed high range, so the hit threshold is kept strict.
+SEMANTIC_CACHE_THRESHOLD = 0.98
+# On disk the cache only grows by appends (see _semantic_cache.SemanticStore): float32 rows go to a raw
+# journal next to the compacted .npy matrix, folded into it every SEMANTIC_COMPACT_ROWS rows
+SEMANTIC_COMPACT_ROWS = 256
+_semantic_cache = SemanticStore(
+    _SUMMARY_CACHE_DIR / 'semantic_embeddings.npy',
+    _SUMMARY_CACHE_DIR / 'semantic_embeddings.f32',    # Rows appended since the last compaction
+    _SUMMARY_CACHE_DIR / 'semantic_summaries.jsonl',   # {summary, tokens_in, tokens_out}, one per row
+    dtype=np.float32,
+    compact_rows=SEMANTIC_COMPACT_ROWS,
+)
+
+# OpenAI clients shared by every summarize()/summarize_async() call, created lazily on first use
+# (one client means one connection pool, so keep-alive connections are reused across papers)
+_openai_client = None
+# AsyncOpenAI clients by event loop: the client's connection pool is bound to the loop that created it,
+# so each asyncio.run() gets its own client instead of reusing one whose loop is already closed
+_async_openai_clients = weakref.WeakKeyDictionary()
+
+
+def _get_openai_client() -> OpenAI:
+    """Lazy create the shared OpenAI client (only create once)."""
+    global _openai_client
+    if _openai_client is None:
+        # Retrieve API key from environment variables
+        api_key = os.getenv("OPENAI_API_KEY")
+        
+        # Validate that API key exists
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment or .env file")
+        
+        # Retries come from _llm_retry
+        _openai_client = OpenAI(
+            api_key=api_key,
+            max_retries=0,
+            http_client=httpx.Client(limits=httpx.Limits(max_keepalive_connections=16)),
+        )
+    return _openai_client
+
+
+# Retry policy for chat completions: exponential backoff with jitter, only on transient errors
+# (rate limits, dropped connections, timeouts, server-side 5xx); other errors fail immediately
+_llm_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_random_exponential(multiplier=1, max=30),
+    retry=retry_if_exception_type((
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError,
+    )),
+    reraise=True,  # Surface the last OpenAI error instead of tenacity's RetryError
+)
+
+
+def _get_async_openai_client() -> AsyncOpenAI:
+    """Lazy create the AsyncOpenAI client for the running event loop (only create once per loop)."""
+    loop = asyncio.get_running_loop()
+    client = _async_openai_clients.get(loop)
+    if client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment or .env file")
+        
+        client = _async_openai_clients[loop] = AsyncOpenAI(
+            api_key=api_key,
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=16)),
+        )
+    return client
+
+
+def _get_summary_cache() -> diskcache.Cache:
+    """Lazy open the on-disk summary cache (only open once)."""
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = diskcache.Cache(str(_SUMMARY_CACHE_DIR))
+    return _summary_cache
+
+
+def _semantic_lookup(embedding: np.ndarray):
+    """Return the cached summary whose input is most similar to `embedding`, if it clears the threshold."""
+    with _semantic_cache.lock:
+        matrix, entries = _semantic_cache.load()
+        if not entries:
+            return None
+        # Vectors are L2-normalized, so the dot product is the cosine similarity
+        sims = matrix @ embedding
+        best = int(np.argmax(sims))
+        if sims[best] >= SEMANTIC_CACHE_THRESHOLD:
+            return entries[best]
+    return None
+
+
+def _build_prompt(raw_text: str, title_guess: str) -> str:
+    """Build the summarization prompt for one paper."""
+    # Construct a detailed prompt that instructs the LLM on:
+    # - Target audience (busy Junior AI Intern)
+    # - Required structure (specific headers)
+    # - Format requirements (markdown with bold headers)
+    # - Length constraints (30-50 words per section, 120-180 total)
+    return (
+        f"Summarize the following AI paper for a busy Junior AI Intern. "
+        f"Use EXACTLY this structure with these exact headers:\n\n"
+        f"**Problem:** [description]\n"        # What problem does the paper address?
+        f"**Approach:** [description]\n"        # How did they solve it?
+        f"**Key Results:** [description]\n"     # What did they find?
+        f"**Why It Matters:** [description]\n\n"  # Why is this important?
+        f"Keep each section to 30-50 words. Total 120–180 words.\n\n"
+        f"Title: {title_guess}\n\n{raw_text[:6000]}"  # Truncate to 6000 chars for token efficiency
+    )
+
+
+def _cache_lookup(prompt: str, raw_text: str, title_guess: str) -> tuple:
+    """
+    Look a prompt up in the exact-match cache, then in the semantic cache.
+    
+    Returns:
+        tuple: (cached entry or None, exact-match cache key, input embedding or None on an exact hit
+                or when the semantic lookup failed)
+    """
+    # Return the cached summary if this exact request was made before
+    cache_key = hashlib.sha256(
+        f"{SUMMARY_MODEL}|{SUMMARY_TEMPERATURE}|{SUMMARY_MAX_TOKENS}|{prompt}".encode("utf-8")
+    ).hexdigest()
+    cached = _get_summary_cache().get(cache_key)
+    if cached is not None:
+        return cached, cache_key, None
+    
+    # Fall back to a semantic match: near-identical paper text already summarized
+    # The semantic cache is an optimization: if the E5 model can't load or run (missing torch,
+    # out of memory, ...), treat it as a miss and let summarize() call the API as usual
+    try:
+        try:
+            from .nn import embed_passages
+        except ImportError:
+            from nn import embed_passages
+        embedding = embed_passages([f"{title_guess}\n\n{raw_text[:6000]}"])[0].numpy()
+        hit = _semantic_lookup(embedding)
+    except Exception as e:
+        print(f"[WARN] Semantic cache lookup failed, skipping it: {e}")
+        return None, cache_key, None
+    if hit is not None:
+        # Reused summary, no API call: report no token spend (as workflow_mode does)
+        return {**hit, "tokens_in": 0, "tokens_out": 0}, cache_key, embedding
+    return None, cache_key, embedding
+
+
+def _cache_store(cache_key: str, embedding: np.ndarray, response) -> dict:
+    """Turn a chat completion into a cache entry and save it in both caches."""
+    # Extract the summary text and token usage (for cost tracking and monitoring)
+    entry = {
+        "summary": response.choices[0].message.content.strip(),
+        "tokens_in": response.usage.prompt_tokens,       # Tokens in the prompt (input)
+        "tokens_out": response.usage.completion_tokens,  # Tokens in the completion (output)
+    }
+    
+    # Cache the result so reruns with the same (or nearly the same) input are free
+    # Both caches are optimizations: a failed write must not lose a completion already paid for
+    try:
+        _get_summary_cache().set(cache_key, entry)
+    except Exception as e:
+        print(f"[WARN] Summary cache store failed, skipping it: {e}")
+    if embedding is not None:  # None when the semantic lookup failed
+        _semantic_cache.store(embedding, entry)  # Logs and skips its own failures
+    return entry
+
+
+@_llm_retry
+def _call_llm(client: OpenAI, prompt: str):
+    """Request one summary completion (retried with backoff on transient errors)."""
+    return client.chat.completions.create(
+        model=SUMMARY_MODEL,              # Fast and cost-effective model
+        messages=[{"role": "user", "content": prompt}],  # Single user message
+        temperature=SUMMARY_TEMPERATURE,  # Balance between creativity and consistency
+        max_tokens=SUMMARY_MAX_TOKENS     # Limit output length to control costs
+    )
+
+
+@_llm_retry
+async def _call_llm_async(client: AsyncOpenAI, prompt: str):
+    """Async version of _call_llm()."""
+    return await client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=SUMMARY_TEMPERATURE,
+        max_tokens=SUMMARY_MAX_TOKENS
+    )
+
+
+def summarize(raw_text: str, title_guess: str = "Untitled") -> dict:
+    """
+    Generate an AI-powered summary of an academic paper.
+    
+    Uses OpenAI's GPT-4o-mini model to create a structured, concise summary
+    formatted for busy AI practitioners. The summary follows a specific template
+    with sections for Problem, Approach, Results, and Significance.
+    
+    Args:
+        raw_text (str): Full text content of the paper to summarize
+        title_guess (str): Estimated or extracted title of the paper. Default: "Untitled"
+        
+    Returns:
+        dict: Summary result containing:
+            - title (str): Paper title
+            - summary (str): LLM-generated structured summary in markdown format
+            - tokens_in (int): Number of input tokens used (for cost tracking)
+            - tokens_out (int): Number of output tokens used (for cost tracking)
+            
+    Raises:
+        ValueError: If OPENAI_API_KEY is not found in environment variables
+        
+    Note:
+        The function truncates input text to 6000 characters to manage token costs.
+        Rate-limit, connection, timeout, and 5xx errors are retried with exponential backoff
+        and jitter (up to 5 attempts) before giving up.
+        Successful summaries are cached on disk, so identical inputs skip the API call.
+        Inputs whose E5 embedding is within SEMANTIC_CACHE_THRESHOLD of a cached one reuse that summary too.
+    """
+    # Shared OpenAI client (raises ValueError if OPENAI_API_KEY is missing)
+    client = _get_openai_client()
+    
+    prompt = _build_prompt(raw_text, title_guess)
+    cached, cache_key, embedding = _cache_lookup(prompt, raw_text, title_guess)
+    if cached is not None:
+        return {"title": title_guess, **cached}
+
+    # Single call; transient API errors are retried with backoff inside _call_llm()
+    try:
+        response = _call_llm(client, prompt)
+    except Exception as e:
+        # Retries exhausted (or a non-retryable error) - return an error result rather than crashing
+        return {
+            "title": title_guess,
+            "summary": "Error summarizing: " + str(e),
+            "tokens_in": 0,
+            "tokens_out": 0
+        }
+    return {"title": title_guess, **_cache_store(cache_key, embedding, response)}
+
+
+async def summarize_async(raw_text: str, title_guess: str = "Untitled") -> dict:
+    """
+    Async version of summarize() using the running event loop's shared AsyncOpenAI client.
+    
+    Same prompt, caches, retry behavior, and return value as summarize().
+    
+    Args:
+        raw_text (str): Full text content of the paper to summarize
+        title_guess (str): Estimated or extracted title of the paper. Default: "Untitled"
+        
+    Returns:
+        dict: Summary result (see summarize())
+        
+    Raises:
+        ValueError: If OPENAI_API_KEY is not found in environment variables
+    """
+    # Shared AsyncOpenAI client for this event loop (raises ValueError if OPENAI_API_KEY is missing)
+    client = _get_async_openai_client()
+    
+    prompt = _build_prompt(raw_text, title_guess)
+    
+    # Cache lookups hit the disk and may run the E5 model, so keep them off the event loop
+    cached, cache_key, embedding = await asyncio.to_thread(_cache_lookup, prompt, raw_text, title_guess)
+    if cached is not None:
+        return {"title": title_guess, **cached}
+    
+    # Same policy as summarize(): backoff retries inside _call_llm_async(), then an error result
+    try:
+        response = await _call_llm_async(client, prompt)
+    except Exception as e:
+        return {
+            "title": title_guess,
+            "summary": "Error summarizing: " + str(e),
+            "tokens_in": 0,
+            "tokens_out": 0
+        }
+    entry = await asyncio.to_thread(_cache_store, cache_key, embedding, response)
+    return {"title": title_guess, **entry}
+
+
+async def summarize_many(docs: list, concurrency: int = 5) -> list:
+    """
+    Summarize several documents concurrently.
+    
+    Args:
+        docs (list): Document dicts with "raw_text" and "title" fields (e.g. from rank_documents())
+        concurrency (int): Maximum number of OpenAI requests in flight at once. Default: 5
+        
+    Returns:
+        list: One summarize() style result per document, in the same order as `docs`
+        
+    Example:
+        summaries = asyncio.run(summarize_many(ranked[:5]))
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def bounded(doc):
+        async with semaphore:
+            return await summarize_async(doc["raw_text"], doc.get("title", "Untitled"))
+    
+    return await asyncio.gather(*(bounded(doc) for doc in docs))
+
+
+def persist(results: list, folder: str = None):
+    """
+    Save summary results to both markdown and JSONL formats.
+    
+    Creates two output files:
+    1. Markdown report (human-readable) - report_YYYY-MM-DD.md
+    2. JSONL data (machine-readable) - runs_YYYY-MM-DD.jsonl
+    
+    The markdown file is formatted for easy reading by humans.
+    The JSONL file contains one JSON object per line for programmatic processing.
+    
+    Args:
+        results (list): List of summary dictionaries, each containing:
+            - title (str): Paper title
+            - url (str): Paper URL
+            - summary (str): LLM-generated summary
+            - tokens_in (int): Input tokens used
+            - tokens_out (int): Output tokens used
+        folder (str): Directory to save files in. Default: None (auto-detects script directory)
+        
+    Returns:
+        None (files are written to disk)
+        
+    Note:
+        The timestamp is generated using the current date (YYYY-MM-DD format).
+        Files are overwritten if they already exist for the same date.
+        If folder is None, files are saved in the same directory as the calling script.
+    """
+    # If no folder specified, use the directory of the calling script
+    if folder is None:
+        # Get the caller's frame to find where the script is running from
+        caller_file = sys._getframe(1).f_code.co_filename
+        folder = str(Path(caller_file).parent)
+    
+    # Generate timestamp for filename (YYYY-MM-DD format)
+    timestamp = datetime.now().strftime("%Y-%m-%d")
+    
+    # Create output directory if needed
+    os.makedirs(folder, exist_ok=True)
+    
+    # Write markdown report
+    md_path = os.path.join(folder, f"report_{timestamp}.md")
+    
+    # Build the whole report in memory and write it with a single call
+    parts = [f"# Weekly AI Paper Brief – {timestamp}\n\n"]  # Header
+    
+    # Each paper summary
+    for i, r in enumerate(results, 1):
+        parts.append(f"### {i}) {r['title']}\n")  # Paper header with index and title
+        parts.append(f"{r['url']}\n\n")            # URL link
+        parts.append(f"{r['summary']}\n\n")        # Summary content (already formatted by LLM)
+        parts.append("---\n\n")                    # Separator line
+    
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write("".join(parts))
+    
+    # Write JSONL data file
+    # JSONL (JSON Lines) format: one JSON object per line
+    jsonl_path = os.path.join(folder, f"runs_{timestamp}.jsonl")
+    
+    # orjson emits UTF-8 bytes directly (no ensure_ascii juggling), so write in binary mode in one go
+    payload = b"".join(orjson.dumps(r) + b"\n" for r in results)
+    with open(jsonl_path, "wb") as f:
+        f.write(payload)
+    
+    # Print confirmation
+    print(f"Saved report: {md_path}")
+    print(f"Saved raw data: {jsonl_path}")
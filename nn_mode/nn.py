@@ -1,24 +1,65 @@
+import contextlib
+import hashlib
+import threading
+from pathlib import Path
+import diskcache
+import numpy as np
 import torch
 import torch.nn.functional as F
 from torch import Tensor
 from transformers import AutoTokenizer, AutoModel
 from typing import List, Union
 
+MODEL_NAME = 'intfloat/e5-base-v2'
+
 # Global model and tokenizer (loaded once for efficiency)
 _tokenizer = None
 _model = None
+_model_lock = threading.Lock()  # summarize_many() embeds from several worker threads: load only once
+
+# Persistent cache of normalized embeddings keyed by (model, sha256(prefixed text))
+# Re-ranking the same papers on a later run then skips the transformer entirely
+_CACHE_DIR = Path(__file__).parent / "_embed_cache"
+_embed_cache = None
+
+# Run on the GPU when one is available, otherwise fall back to CPU
+_device = "cuda" if torch.cuda.is_available() else "cpu"
 
 
 def _get_model():
     """Lazy load the model and tokenizer (only load once)."""
     global _tokenizer, _model
-    if _tokenizer is None or _model is None:
-        print("Loading E5 model (this may take a moment on first call)...")
-        _tokenizer = AutoTokenizer.from_pretrained('intfloat/e5-base-v2')
-        _model = AutoModel.from_pretrained('intfloat/e5-base-v2')
+    if _model is None:
+        with _model_lock:
+            if _model is None:  # Another thread may have loaded it while we waited
+                print("Loading E5 model (this may take a moment on first call)...")
+                tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+                model = AutoModel.from_pretrained(MODEL_NAME).to(_device).eval()
+                if _device == "cuda":
+                    # Fuse kernels once at load time; dynamic=True avoids recompiling for every padded batch length
+                    model = torch.compile(model, dynamic=True)
+                # Publish the tokenizer before the model: the unlocked check above only looks at _model
+                _tokenizer = tokenizer
+                _model = model
     return _tokenizer, _model
 
 
+def _autocast():
+    """Mixed-precision context for the forward pass (bf16/fp16 on GPU, plain fp32 on CPU)."""
+    if _device == "cuda":
+        dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        return torch.autocast(device_type="cuda", dtype=dtype)
+    return contextlib.nullcontext()
+
+
+def _get_cache() -> diskcache.Cache:
+    """Lazy open the on-disk embedding cache (only open once)."""
+    global _embed_cache
+    if _embed_cache is None:
+        _embed_cache = diskcache.Cache(str(_CACHE_DIR))
+    return _embed_cache
+
+
 def average_pool(last_hidden_states: Tensor,
                  attention_mask: Tensor) -> Tensor:
     """Average pool the hidden states, masking out padding tokens."""
@@ -26,13 +67,48 @@ def average_pool(last_hidden_states: Tensor,
     return last_hidden.sum(dim=1) / attention_mask.sum(dim=1)[..., None]
 
 
+def _embed(input_texts: List[str]) -> Tensor:
+    """Embed already-prefixed texts in one batched forward pass, returning L2-normalized fp32 CPU vectors."""
+    # Get model and tokenizer (lazy loaded)
+    tokenizer, model = _get_model()
+    
+    # Tokenize the input texts
+    batch_dict = tokenizer(input_texts, max_length=512, padding=True, truncation=True, return_tensors='pt')
+    batch_dict = {k: v.to(_device, non_blocking=True) for k, v in batch_dict.items()}
+    
+    # Get embeddings (no autograd bookkeeping, reduced precision on GPU)
+    with torch.inference_mode(), _autocast():
+        outputs = model(**batch_dict)
+        embeddings = average_pool(outputs.last_hidden_state, batch_dict['attention_mask'])
+    
+    # Normalize embeddings (L2 normalization for cosine similarity)
+    # Cast back to fp32 on CPU so scores and returned embeddings look the same on every device
+    return F.normalize(embeddings.float(), p=2, dim=1).cpu()
+
+
+def _embed_cached(input_texts: List[str]) -> Tensor:
+    """Like _embed(), but reuses vectors from the disk cache and only embeds the misses."""
+    cache = _get_cache()
+    keys = [f"{MODEL_NAME}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}" for text in input_texts]
+    vectors = [cache.get(key) for key in keys]
+    
+    misses = [i for i, vec in enumerate(vectors) if vec is None]
+    if misses:
+        fresh = _embed([input_texts[i] for i in misses]).numpy()
+        for i, vec in zip(misses, fresh):
+            cache.set(keys[i], vec)
+            vectors[i] = vec
+    
+    return torch.from_numpy(np.stack(vectors))
+
+
 def rank_passages(query: str, passages: List[str], return_embeddings: bool = False) -> Union[List[float], tuple]:
     """
     Rank passages by their relevance to a query using the E5 embedding model.
     
     Args:
         query (str): The search query (e.g., "Agentic AI")
-        passages (List[str]): List of text passages to rank
+        passages (List[str]): List of text passages to rank (truncated to 512 tokens by the tokenizer)
         return_embeddings (bool): If True, also return the query and passage embeddings
         
     Returns:
@@ -45,39 +121,39 @@ def rank_passages(query: str, passages: List[str], return_embeddings: bool = Fal
     if not passages:
         return [] if not return_embeddings else ([], None, None)
     
-    # Get model and tokenizer (lazy loaded)
-    tokenizer, model = _get_model()
-    
     # Format inputs: E5 model expects "query: " or "passage: " prefixes
     input_texts = [f'query: {query}']
     for passage in passages:
         input_texts.append(f'passage: {passage}')
     
-    # Tokenize the input texts
-    batch_dict = tokenizer(input_texts, max_length=512, padding=True, truncation=True, return_tensors='pt')
+    # Embed the query together with the passages: one tokenizer call and one forward pass
+    # (cache hits are read from disk, only misses go through the model)
+    embeddings = _embed_cached(input_texts)
     
-    # Get embeddings
-    with torch.no_grad():  # Disable gradient computation for inference
-        outputs = model(**batch_dict)
-        embeddings = average_pool(outputs.last_hidden_state, batch_dict['attention_mask'])
-    
-    # Normalize embeddings (L2 normalization for cosine similarity)
-    embeddings = F.normalize(embeddings, p=2, dim=1)
-    
-    # Compute similarity scores
+    # Compute similarity scores: one matrix-vector product against the single query embedding
+    # (vectors are L2-normalized, so the dot product is the cosine similarity)
     query_emb = embeddings[0]
     passage_embs = embeddings[1:]
-    scores = (query_emb @ passage_embs.T).squeeze().tolist()
-    
-    # Handle single passage case (scores might be a scalar)
-    if not isinstance(scores, list):
-        scores = [scores]
+    scores = (passage_embs @ query_emb).tolist()  # Always a list, even for a single passage
     
     if return_embeddings:
         return scores, query_emb, passage_embs
     return scores
 
 
+def embed_passages(passages: List[str]) -> Tensor:
+    """
+    Embed passages with the E5 model, reusing the on-disk embedding cache.
+    
+    Args:
+        passages (List[str]): Text passages to embed ("passage: " prefix is added here)
+        
+    Returns:
+        Tensor: L2-normalized embeddings, one row per passage
+    """
+    return _embed_cached([f'passage: {passage}' for passage in passages])
+
+
 # Example usage (commented out - can be used for testing)
 if __name__ == "__main__":
     topic = "Agentic AI"
@@ -1,7 +1,9 @@
 """
 Test script to verify the ranking functionality works with fetch().
 """
-from tools import search, fetch, rank_documents, summarize, persist
+import asyncio
+from tools import search, fetch_many_sync, rank_documents
+from llm_utils import summarize_many, persist
 
 # Test the workflow
 if __name__ == "__main__":
@@ -14,13 +16,12 @@ if __name__ == "__main__":
     
     print("\n" + "=" * 60)
     print("Step 2: Fetching content from papers...")
-    fetched = []
-    for paper in papers:
-        print(f"Fetching: {paper['title'][:50]}...")
-        doc = fetch(paper['url'])
+    # All pages are downloaded concurrently; results come back in the same order as papers
+    fetched = fetch_many_sync([paper['url'] for paper in papers])
+    for paper, doc in zip(papers, fetched):
+        print(f"Fetched: {paper['title'][:50]}...")
         doc['title'] = paper['title']  # Preserve original title
         doc['id'] = paper.get('id', '')
-        fetched.append(doc)
     
     print("\n" + "=" * 60)
     print("Step 3: Ranking documents by relevance...")
@@ -42,18 +43,16 @@ if __name__ == "__main__":
     
     print("\n" + "=" * 60)
     print(f"Step 4: Summarizing top {limit} papers...")
-    summaries = []
-    count = 0
-    for doc in ranked:
-        if count >= limit:
-            break
-        if doc.get('kind') != 'error' and doc.get('raw_text'):
-            print(f"Summarizing: {doc['title'][:50]}...")
-            summary_result = summarize(doc['raw_text'], doc['title'])
-            summary_result['url'] = doc.get('url', '')
-            summary_result['score'] = doc.get('score', 0)
-            summaries.append(summary_result)
-            count += 1
+    # Summaries are network-bound OpenAI calls, so run them concurrently
+    to_summarize = [doc for doc in ranked if doc.get('kind') != 'error' and doc.get('raw_text')][:limit]
+    for doc in to_summarize:
+        print(f"Summarizing: {doc['title'][:50]}...")
+    
+    # gather() keeps results in ranking order
+    summaries = asyncio.run(summarize_many(to_summarize))
+    for doc, summary_result in zip(to_summarize, summaries):
+        summary_result['url'] = doc.get('url', '')
+        summary_result['score'] = doc.get('score', 0)
     
     print("\n" + "=" * 60)
     print("Step 5: Saving results...")
@@ -0,0 +1,148 @@
+"""
+Test the semantic cache store (_semantic_cache.SemanticStore)
+
+Covers the crash-recovery and compaction paths shared by nn_mode and workflow_mode:
+- Torn journal rows and torn sidecar lines are dropped on load
+- Misaligned files are trimmed to their aligned prefix and rewritten on the next store
+- Journal rows are folded into the .npy every compact_rows stores
+- A failed store leaves the cache reloadable and correctly aligned
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from _semantic_cache import SemanticStore
+
+DIM = 8
+
+
+def _store(folder: Path, dtype=np.float32, compact_rows: int = 256) -> SemanticStore:
+    return SemanticStore(folder / "emb.npy", folder / "emb.log", folder / "meta.jsonl",
+                         dtype=dtype, compact_rows=compact_rows)
+
+
+def _row(i: int) -> np.ndarray:
+    vec = np.zeros(DIM, dtype=np.float32)
+    vec[i % DIM] = 1.0
+    return vec
+
+
+def _load(cache: SemanticStore) -> tuple:
+    with cache.lock:
+        return cache.load()
+
+
+def test_roundtrip_through_journal():
+    """Stored rows survive a reload from a fresh store (journal plus .npy)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        cache = _store(folder)
+        for i in range(3):
+            cache.store(_row(i), {"summary": f"s{i}"})
+        assert (folder / "emb.log").exists()
+
+        matrix, entries = _load(_store(folder))
+        assert [e["summary"] for e in entries] == ["s0", "s1", "s2"]
+        assert np.array_equal(matrix, np.stack([_row(i) for i in range(3)]))
+
+
+def test_torn_tail_recovery():
+    """A torn last journal row and a torn last sidecar line are dropped, keeping rows and entries aligned."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        cache = _store(folder)
+        for i in range(3):
+            cache.store(_row(i), {"summary": f"s{i}"})
+
+        # Crash mid-store: half a row in the journal, half a line in the sidecar
+        with open(folder / "emb.log", "ab") as f:
+            f.write(_row(3).tobytes()[:DIM * 2])
+        with open(folder / "meta.jsonl", "ab") as f:
+            f.write(b'{"summary": "s')
+
+        matrix, entries = _load(_store(folder))
+        assert len(matrix) == len(entries) == 3
+        assert entries[-1]["summary"] == "s2"
+
+
+def test_orphan_row_is_trimmed_and_rewritten():
+    """A journal row without its sidecar line is trimmed on load, and the next store realigns both files."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        cache = _store(folder)
+        for i in range(2):
+            cache.store(_row(i), {"summary": f"s{i}"})
+        # Row written, sidecar append lost
+        with open(folder / "emb.log", "ab") as f:
+            f.write(_row(5).tobytes())
+
+        cache = _store(folder)
+        matrix, entries = _load(cache)
+        assert len(matrix) == len(entries) == 2
+
+        cache.store(_row(2), {"summary": "s2"})
+        matrix, entries = _load(_store(folder))
+        assert [e["summary"] for e in entries] == ["s0", "s1", "s2"]
+        assert np.array_equal(matrix[2], _row(2))  # Paired with its own entry, not the orphan's row
+
+
+def test_failed_store_resyncs():
+    """A sidecar append that fails after its journal row is written doesn't misalign later stores."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        cache = _store(folder)
+        cache.store(_row(0), {"summary": "s0"})
+        cache.store(_row(1), {"summary": "s1"})
+
+        cache.store(_row(2), {"summary": object()})  # orjson can't serialize it: fails after the journal row
+        cache.store(_row(3), {"summary": "s3"})
+
+        matrix, entries = _load(_store(folder))
+        assert [e["summary"] for e in entries] == ["s0", "s1", "s3"]
+        assert np.array_equal(matrix[2], _row(3))
+
+
+def test_compaction():
+    """Every compact_rows journal rows are folded into the .npy and the journal is emptied."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        cache = _store(folder, dtype=np.float16, compact_rows=4)
+        for i in range(6):
+            cache.store(_row(i), {"summary": f"s{i}"})
+
+        # Store 0 writes the .npy (no files yet), stores 1-4 fill the journal, store 5 compacts
+        assert not (folder / "emb.log").exists()
+        assert np.load(folder / "emb.npy").dtype == np.float16
+
+        matrix, entries = _load(_store(folder, dtype=np.float16, compact_rows=4))
+        assert matrix.dtype == np.float32
+        assert [e["summary"] for e in entries] == [f"s{i}" for i in range(6)]
+        assert np.array_equal(matrix, np.stack([_row(i) for i in range(6)]))
+
+
+def test_unreadable_cache_starts_over():
+    """A corrupt .npy is treated as an empty cache, and the next store rewrites both files."""
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        (folder / "emb.npy").write_bytes(b"not a numpy file")
+        (folder / "meta.jsonl").write_bytes(b'{"summary": "old"}\n')
+
+        cache = _store(folder)
+        matrix, entries = _load(cache)
+        assert matrix is None and entries == []
+
+        cache.store(_row(0), {"summary": "s0"})
+        matrix, entries = _load(_store(folder))
+        assert [e["summary"] for e in entries] == ["s0"]
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"[OK] {test.__name__}")
+    print(f"\n{len(tests)} tests passed")
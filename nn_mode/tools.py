@@ -1,20 +1,200 @@
 # Import required libraries
 import requests                           # For making HTTP requests to arXiv API
-import json                               # JSON handling (though this file primarily uses XML)
-import xml.etree.ElementTree as ET        # For parsing arXiv's XML response format
-from datetime import datetime, timedelta  # Date utilities (currently not used but available for future features)
+from requests.adapters import HTTPAdapter # Connection pool settings for the shared session
+from urllib3.util.retry import Retry      # Automatic retries for transient connection errors
+import asyncio                            # Concurrent page fetching in fetch_many()
+import contextlib                         # No-op context manager for requests that skip the arXiv limiter
+import weakref                            # Per-event-loop arXiv semaphores
+import aiohttp                            # Async HTTP client used by fetch_async()/fetch_many()
+try:
+    from lxml import etree as ET          # libxml2-backed C parser for arXiv's XML response format
+except ImportError:
+    import xml.etree.ElementTree as ET    # Standard library fallback (same iterparse/findtext API)
+_LXML = hasattr(ET, 'LXML_VERSION')       # lxml-only extras: iterparse(tag=...) and sibling cleanup
 from bs4 import BeautifulSoup             # HTML parsing and text extraction
-import re                                 # Regular expressions for text processing
-from openai import OpenAI                 # OpenAI Python SDK for LLM API calls
-import os                                 # Environment variable access and file operations
 from pathlib import Path                  # Path manipulation
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode  # URL normalization for cache keys
+import diskcache                          # Persistent on-disk cache of search()/fetch() results
 from dotenv import load_dotenv            # Load .env file for configuration
-import inspect                            # For detecting caller's file location
+import numpy as np                        # Vectorized sorting of ranking scores
+import re                                 # PDF -> abstract URL rewriting
+
+# summarize() and persist() live in llm_utils.py; re-exported here so existing imports keep working
+try:
+    from .llm_utils import summarize, persist
+except ImportError:
+    from llm_utils import summarize, persist
 
 # Load environment variables from .env file in project root
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(env_path)
 
+# User-Agent header identifying our bot (helps servers handle our requests appropriately)
+# Accept-Encoding explicitly asks for compressed bodies (arXiv's Atom XML shrinks a lot);
+# both requests and aiohttp decode gzip/deflate transparently
+_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; workflow-bot)',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+# Shared HTTP session: keeps TCP/TLS connections alive and pooled across search() and fetch() calls,
+# so repeated arxiv.org requests skip the handshake
+_SESSION = requests.Session()
+_SESSION.headers.update(_HEADERS)
+# Retries back off exponentially on connection errors and on arXiv's rate-limit/overload responses,
+# waiting for the server's Retry-After when one is sent
+_RETRY = Retry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    respect_retry_after_header=True,
+    allowed_methods=['GET'],
+)
+_ADAPTER = HTTPAdapter(pool_connections=10, pool_maxsize=32, max_retries=_RETRY)
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.mount('http://', _ADAPTER)
+
+# Maximum concurrent async requests to arxiv.org (arXiv blocks clients that hammer it)
+ARXIV_MAX_CONCURRENCY = 4
+_arxiv_semaphores = weakref.WeakKeyDictionary()
+
+# Characters of each document embedded for ranking: ~400 tokens at ~4 chars/token (E5 max is 512)
+RANK_MAX_CHARS = 1600
+
+# Maximum bytes of HTML read per page; arXiv abstract pages fit comfortably, and the rest
+# of an oversized page would be cut by MAX_TEXT_CHARS anyway
+MAX_PAGE_BYTES = 256 * 1024
+
+# Maximum characters of page text kept by fetch(); matches the summarize() prompt truncation
+MAX_TEXT_CHARS = 6000
+
+# Persistent cache of search() and fetch() results, so repeated runs on overlapping topics
+# don't re-download the same arXiv listings and abstract pages
+_HTTP_CACHE_DIR = Path(__file__).parent / "_http_cache"
+_http_cache = None
+FETCH_CACHE_TTL = 24 * 3600   # Abstract pages rarely change: keep fetched pages for a day
+SEARCH_CACHE_TTL = 3600       # Search listings pick up new submissions: keep them for an hour
+
+# arXiv PDF link: /pdf/<id> with an optional .pdf suffix anchored at the end of the URL
+# (anchored to arXiv hosts so other sites' /pdf/ paths are left alone)
+_PDF_RE = re.compile(r'^(https?://(?:www\.|export\.)?arxiv\.org)/pdf/(.+?)(?:\.pdf)?$')
+
+# rank_passages is resolved on first use: importing nn loads torch/transformers,
+# which search() and fetch() callers shouldn't have to pay for
+_rank_passages = None
+
+# Fully-qualified Atom tag names used by the arXiv API, built once instead of per lookup
+_ATOM = '{http://www.w3.org/2005/Atom}'
+_ATOM_ENTRY = _ATOM + 'entry'
+_ATOM_TITLE = _ATOM + 'title'
+_ATOM_ID = _ATOM + 'id'
+
+
+def _get_ranker():
+    """Lazy import rank_passages (only import once)."""
+    global _rank_passages
+    if _rank_passages is None:
+        # Works from both parent directory and nn_mode directory
+        try:
+            from .nn import rank_passages
+        except ImportError:
+            from nn import rank_passages
+        _rank_passages = rank_passages
+    return _rank_passages
+
+
+def _get_http_cache() -> diskcache.Cache:
+    """Lazy open the on-disk search/fetch cache (only open once)."""
+    global _http_cache
+    if _http_cache is None:
+        _http_cache = diskcache.Cache(str(_HTTP_CACHE_DIR))
+    return _http_cache
+
+
+def _normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL used as the fetch() cache key.
+    
+    Lowercases scheme and host, drops utm_* tracking parameters and fragments, and maps
+    arXiv PDF links (/pdf/<id>.pdf) to their abstract page (/abs/<id>) so both share one entry.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    path = parts.path
+    if 'arxiv.org' in host and path.startswith('/pdf/'):
+        path = '/abs/' + path[len('/pdf/'):]
+        if path.endswith('.pdf'):
+            path = path[:-len('.pdf')]
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                       if not k.lower().startswith('utm_')])
+    return urlunsplit((parts.scheme.lower(), host, path, query, ''))
+
+
+def _arxiv_semaphore() -> asyncio.Semaphore:
+    """Semaphore gating arxiv.org requests on the running event loop (asyncio primitives can't be shared across loops)."""
+    loop = asyncio.get_running_loop()
+    semaphore = _arxiv_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _arxiv_semaphores[loop] = asyncio.Semaphore(ARXIV_MAX_CONCURRENCY)
+    return semaphore
+
+
+def _to_abs_url(url: str) -> str:
+    """Map an arXiv PDF link to its abstract page (https://arxiv.org/pdf/2405.12345.pdf -> https://arxiv.org/abs/2405.12345)."""
+    # One anchored substitution: '.pdf' elsewhere in the URL (e.g. a query string) is left alone
+    # Non-arXiv URLs don't match and are returned unchanged
+    return _PDF_RE.sub(r'\1/abs/\2', url)
+
+
+def _error_doc(url: str, error: str) -> dict:
+    """fetch() style document for a page that could not be fetched or parsed."""
+    return {"title": "Error", "url": url, "raw_text": "", "kind": "error", "error": error}
+
+
+def _prepare_fetch(url: str) -> tuple:
+    """
+    Shared first step of fetch() and fetch_async(), before any request is made.
+    
+    Rewrites arXiv PDF links to the abstract page (avoids downloading a multi-MB PDF only to throw it away),
+    rejects other PDFs, and looks the page up in the disk cache (an unreadable cache counts as a miss).
+    
+    Returns:
+        tuple: (URL to request, cache key, document to return as-is or None if the page must be fetched)
+    """
+    if 'arxiv.org/pdf/' in url:
+        url = _to_abs_url(url)
+    
+    # Other PDFs have no abstract page to fall back to and can't be parsed as HTML
+    if url.lower().endswith('.pdf'):
+        return url, None, _error_doc(url, "PDF content is not supported")
+    
+    # Serve previously fetched pages from the disk cache (errors are never cached)
+    cache_key = _normalize_url(url)
+    try:
+        cached = _get_http_cache().get(cache_key)
+    except Exception as e:
+        print(f"[WARN] Fetch cache lookup failed, skipping it: {e}")
+        cached = None
+    return url, cache_key, cached
+
+
+def _is_pdf(headers) -> bool:
+    """
+    Whether a response is a PDF served without a .pdf suffix.
+    
+    arXiv PDF links were already rewritten by _prepare_fetch(), so there is no abstract page left
+    to retry on: the caller returns an error document without downloading the body.
+    """
+    return 'pdf' in headers.get('Content-Type', '')
+
+
+def _cache_page(cache_key: str, doc: dict):
+    """Store a parsed page in the disk cache for FETCH_CACHE_TTL (failures are logged and skipped)."""
+    try:
+        _get_http_cache().set(cache_key, doc, expire=FETCH_CACHE_TTL)
+    except Exception as e:
+        print(f"[WARN] Fetch cache store failed, skipping it: {e}")
+
 
 def search(topic: str, limit: int):
     """
@@ -36,7 +216,14 @@ def search(topic: str, limit: int):
             
     Note:
         The arXiv API is free and public - no API key required!
+        Successful results are cached on disk for SEARCH_CACHE_TTL seconds per (topic, limit).
     """
+    # Serve repeated searches from the disk cache
+    cache_key = f"search:{topic}:{limit}"
+    cached = _get_http_cache().get(cache_key)
+    if cached is not None:
+        print(f"[CACHE] Using cached arXiv results for: {topic}")
+        return cached
     
     try:
         # arXiv's export API endpoint - free, public, no auth required
@@ -50,61 +237,72 @@ def search(topic: str, limit: int):
             "max_results": limit * 2            # Maximum number of results to return, times 2
         }
         
-        # Set User-Agent header to identify our bot (courtesy to arXiv servers)
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (compatible; workflow-bot)'
-        }
-        
         # Log what we're searching for
         print(f"Searching arXiv for: {topic}")
         
         # Make the API request with 10 second timeout
-        response = requests.get(arxiv_url, params=params, headers=headers, timeout=10)
-        
-        # Raise an exception if HTTP status code indicates an error
-        response.raise_for_status()
+        # stream=True lets us parse entries while the body is still arriving
+        # (the shared session sends our User-Agent header and reuses pooled connections)
+        # The with-block closes the streamed response even if parsing raises
+        with _SESSION.get(arxiv_url, params=params, timeout=10, stream=True) as response:
         
-        # ================================================
-        # Parse XML response from arXiv
-        # ================================================
-        # arXiv returns data in XML/Atom format
-        root = ET.fromstring(response.content)
+            # Raise an exception if HTTP status code indicates an error
+            response.raise_for_status()
         
-        # Define the Atom namespace used by arXiv XML
-        # This is needed to properly extract elements from the XML tree
-        ns = {'atom': 'http://www.w3.org/2005/Atom'}
+            # Let urllib3 undo any gzip/deflate content encoding while streaming
+            response.raw.decode_content = True
         
-        results = []
+            # ================================================
+            # Parse XML response from arXiv
+            # ================================================
+            # arXiv returns data in XML/Atom format
+            # Tags are matched against the precomputed {namespace}tag constants above
+            # Collected as parallel lists (one append per field) and turned into dicts once at the end
+            titles = []
+            paper_ids = []
         
-        # Iterate through each paper entry in the XML
-        for entry in root.findall('atom:entry', ns):
-            # Extract title: remove whitespace and formatting
-            title = entry.find('atom:title', ns).text.strip()
-            
-            # Extract arXiv paper ID from the URL
-            # Example: "http://arxiv.org/abs/2405.12345" -> "2405.12345"
-            paper_id = entry.find('atom:id', ns).text.split('/')[-1]
+            # Stream through the XML, handling each paper entry as soon as it is complete
+            # (avoids buffering the whole response and building the full tree first)
+            # With lxml, the tag filter runs in C so only <entry> elements reach the Python loop
+            if _LXML:
+                entries = ET.iterparse(response.raw, events=('end',), tag=_ATOM_ENTRY)
+            else:
+                entries = ET.iterparse(response.raw, events=('end',))
+            for _, entry in entries:
+                if entry.tag != _ATOM_ENTRY:
+                    continue
             
-            # Construct the abstract page URL
-            url = f"https://arxiv.org/abs/{paper_id}"
+                # Extract title: remove whitespace and formatting
+                titles.append(entry.findtext(_ATOM_TITLE, '').strip())
             
-            # Try to extract abstract if available
-            abstract = entry.find('atom:summary', ns)
-            abstract_text = abstract.text.strip() if abstract is not None else "No abstract available"
+                # Extract arXiv paper ID from the URL
+                # Example: "http://arxiv.org/abs/2405.12345" -> "2405.12345"
+                paper_ids.append(entry.findtext(_ATOM_ID, '').rsplit('/', 1)[-1])
             
-            # Build result dictionary
-            results.append({
-                "title": title,      # Paper title
-                "url": url,          # Link to paper's abstract page on arXiv
-                "source": "arxiv",   # Indicates this came from arXiv API
-                "id": paper_id       # arXiv paper ID (e.g., "2405.12345v1")
-            })
+                # Free the processed entry's children so memory stays flat as we stream
+                entry.clear()
+                if _LXML:
+                    # Also drop the already-processed (now empty) siblings still attached to the root
+                    while entry.getprevious() is not None:
+                        del entry.getparent()[0]
+        
+        # Build the public result dictionaries in one pass
+        results = [
+            {
+                "title": title,                              # Paper title
+                "url": f"https://arxiv.org/abs/{paper_id}",  # Link to paper's abstract page on arXiv
+                "source": "arxiv",                           # Indicates this came from arXiv API
+                "id": paper_id                               # arXiv paper ID (e.g., "2405.12345v1")
+            }
+            for title, paper_id in zip(titles, paper_ids)
+        ]
         
         # ================================================
         # Return results or handle empty response
         # ================================================
         if results:
             print(f"[OK] Found {len(results)} papers from arXiv")
+            _get_http_cache().set(cache_key, results, expire=SEARCH_CACHE_TTL)
             return results
         else:
             # No results found - return an error indicator
@@ -140,53 +338,264 @@ def fetch(url: str, timeout: int = 10) -> dict:
             - error (str): Error message (only present if kind="error")
             
     Note:
-        PDF URLs are automatically converted to abstract page URLs.
+        arXiv PDF URLs are automatically converted to abstract page URLs;
+        other PDFs return an error dict.
         Scripts, styles, and navigation elements are stripped from HTML.
+        Successfully parsed pages are cached on disk for FETCH_CACHE_TTL seconds, keyed on the normalized URL.
     """
-    # Set User-Agent header to identify our bot
-    # This helps servers handle our requests appropriately
-    headers = {'User-Agent': 'Mozilla/5.0 (compatible; workflow-bot)'}
+    # arXiv papers can be accessed via PDF or abstract page
+    # We prefer abstract pages as they have more metadata, so PDF links are rewritten before requesting anything
+    url, cache_key, doc = _prepare_fetch(url)
+    if doc is not None:
+        return doc
     
     # ================================================
     # Step 1: Fetch the URL with error handling
     # ================================================
+    response = None
     try:
-        # Make GET request with timeout to prevent hanging
-        response = requests.get(url, headers=headers, timeout=timeout)
+        # Make GET request with timeout to prevent hanging (pooled connection via the shared session)
+        # stream=True defers the body download until we know the response is not a PDF
+        response = _SESSION.get(url, timeout=timeout, stream=True)
         
         # Raise exception if HTTP status code indicates error (4xx, 5xx)
         response.raise_for_status()
     except Exception as e:
+        # Release the pooled connection of a 4xx/5xx response (its body was never read)
+        if response is not None:
+            response.close()
+        
         # Return error dictionary if fetch fails
         # This allows the pipeline to continue processing other papers
-        return {
-            "title": "Error",
-            "url": url,
-            "raw_text": "",
-            "kind": "error",
-            "error": str(e)
-        }
+        return _error_doc(url, str(e))
 
     # ================================================
-    # Step 2: Handle PDF links (redirect to abstract page)
+    # Step 2: Handle PDFs served without a .pdf suffix
     # ================================================
-    # arXiv papers can be accessed via PDF or abstract page
-    # We prefer abstract pages as they have more metadata
-    if url.endswith('.pdf') or 'pdf' in response.headers.get('Content-Type', ''):
-        # Convert PDF URL to abstract page URL
-        # Example: https://arxiv.org/pdf/2405.12345.pdf -> https://arxiv.org/abs/2405.12345
-        abs_url = url.replace('/pdf/', '/abs/').replace('.pdf', '')
+    if _is_pdf(response.headers):
+        # Drop the connection without downloading the PDF body
+        response.close()
+        return _error_doc(url, "PDF content is not supported")
+
+    # ================================================
+    # Steps 3-6: Parse HTML into the document dict
+    # ================================================
+    # Read at most MAX_PAGE_BYTES (decompressed) and drop the rest of the body
+    # (closed in finally so a read timeout mid-body doesn't leak the connection)
+    try:
+        html = response.raw.read(MAX_PAGE_BYTES, decode_content=True)
+    finally:
+        response.close()
+    
+    # Pass raw bytes so lxml detects the encoding from <meta charset> itself
+    doc = _parse_page(url, html)
+    _cache_page(cache_key, doc)
+    return doc
+
+
+async def _read_limited(stream: aiohttp.StreamReader, limit: int) -> bytes:
+    """Read up to `limit` bytes from an aiohttp response body, stopping early at EOF."""
+    chunks = []
+    remaining = limit
+    while remaining > 0:
+        chunk = await stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+async def fetch_async(session: aiohttp.ClientSession, url: str, timeout: int = 10) -> dict:
+    """
+    Async version of fetch() for use with a shared aiohttp session.
+    
+    Same behavior and return value as fetch(); HTML parsing runs in a worker
+    thread so it does not block other downloads on the event loop.
+    
+    Args:
+        session (aiohttp.ClientSession): Session to issue the request on
+        url (str): URL of the page to fetch
+        timeout (int): Request timeout in seconds. Default: 10
+        
+    Returns:
+        dict: Document data (see fetch())
+    """
+    # Same PDF rewrite, PDF rejection, and disk cache as fetch()
+    url, cache_key, doc = _prepare_fetch(url)
+    if doc is not None:
+        return doc
+    
+    # Cap concurrent arxiv.org requests so large batches don't trip its rate limits
+    limiter = _arxiv_semaphore() if 'arxiv.org' in url else contextlib.nullcontext()
+    
+    try:
+        async with limiter, session.get(url, headers=_HEADERS, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            response.raise_for_status()
+            
+            # PDF without a .pdf suffix: skip downloading the body (see fetch())
+            if _is_pdf(response.headers):
+                return _error_doc(url, "PDF content is not supported")
+            html = await _read_limited(response.content, MAX_PAGE_BYTES)
+    except Exception as e:
+        return _error_doc(url, str(e))
+    
+    doc = await asyncio.to_thread(_parse_page, url, html)
+    _cache_page(cache_key, doc)
+    return doc
+
+
+async def fetch_many(urls: list, timeout: int = 10, concurrency: int = 10) -> list:
+    """
+    Fetch several URLs concurrently.
+    
+    Args:
+        urls (list): URLs to fetch
+        timeout (int): Per-request timeout in seconds. Default: 10
+        concurrency (int): Maximum number of requests in flight at once. Default: 10
+        
+    Returns:
+        list: One fetch() style document dict per URL, in the same order as `urls`
+        
+    Example:
+        papers = search("Agentic AI", limit=5)
+        fetched = asyncio.run(fetch_many([paper["url"] for paper in papers]))
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def bounded(session, url):
+        async with semaphore:
+            return await fetch_async(session, url, timeout)
+    
+    # One session (and connection pool) for the whole batch
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        results = await asyncio.gather(*(bounded(session, url) for url in urls), return_exceptions=True)
+    
+    # fetch_async() reports request errors itself; anything else still becomes an error document
+    return [
+        _error_doc(url, str(result)) if isinstance(result, BaseException) else result
+        for url, result in zip(urls, results)
+    ]
+
+
+def fetch_many_sync(urls: list, timeout: int = 10, concurrency: int = 10) -> list:
+    """
+    Blocking wrapper around fetch_many() for synchronous callers.
+    
+    Args:
+        urls (list): URLs to fetch
+        timeout (int): Per-request timeout in seconds. Default: 10
+        concurrency (int): Maximum number of requests in flight at once. Default: 10
+        
+    Returns:
+        list: One fetch() style document dict per URL, in the same order as `urls`
+    """
+    return asyncio.run(fetch_many(urls, timeout, concurrency))
+
+
+async def search_and_rank(topic: str, limit: int, batch_size: int = 8, timeout: int = 10) -> list:
+    """
+    Search arXiv, fetch every result concurrently, and rank the pages against the topic.
+    
+    Pipelined version of search() -> fetch() -> rank_documents(): pages are handed to the
+    ranker in batches as soon as they finish downloading, so embedding overlaps with the
+    downloads that are still in flight.
+    
+    Args:
+        topic (str): Search query, also used as the ranking query
+        limit (int): Passed to search() (which requests limit * 2 papers)
+        batch_size (int): Number of fetched pages embedded per rank_passages() call. Default: 8
+        timeout (int): Per-request timeout in seconds. Default: 10
         
-        # Recursively call fetch with the abstract page URL
-        # This ensures we get HTML content, not PDF binary data
-        return fetch(abs_url)
+    Returns:
+        list: Same as rank_documents(): documents with a "score" field, highest first,
+              followed by documents that could not be ranked
+              
+    Example:
+        ranked = asyncio.run(search_and_rank("Agentic AI", limit=5))
+    """
+    rank_passages = _get_ranker()
+    
+    # search() is synchronous (streamed XML parse + disk cache), so run it off the event loop
+    papers = await asyncio.to_thread(search, topic, limit)
+    urls = [paper["url"] for paper in papers if paper.get("url")]
+    
+    # Bounded hand-off between the downloader and the ranker
+    queue = asyncio.Queue(maxsize=batch_size * 2)
+    ranked = []     # Documents with a relevance score
+    unranked = []   # Error/empty documents (score 0.0, listed last)
+    
+    async def fetch_one(session, url):
+        # As in fetch_many(): one failing URL becomes an error document instead of aborting the pipeline
+        try:
+            return await fetch_async(session, url, timeout)
+        except Exception as e:
+            return _error_doc(url, str(e))
+    
+    async def produce():
+        # One session for all downloads; documents are queued in completion order
+        connector = aiohttp.TCPConnector(limit=16)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            for next_doc in asyncio.as_completed([fetch_one(session, url) for url in urls]):
+                await queue.put(await next_doc)
+        await queue.put(None)  # Sentinel: no more documents
+    
+    async def rank_batch(batch):
+        # Embedding is CPU/GPU bound, so it runs in a worker thread while downloads continue
+        try:
+            scores = await asyncio.to_thread(rank_passages, topic, [doc["raw_text"][:RANK_MAX_CHARS] for doc in batch])
+        except Exception as e:
+            # Keep the other batches: this one's documents are listed unranked
+            for doc in batch:
+                doc["score"] = 0.0
+                doc["_debug"] = f"Ranking failed: {e}"
+            unranked.extend(batch)
+            return
+        for doc, score in zip(batch, scores):
+            doc["score"] = float(score)
+        ranked.extend(batch)
+    
+    async def consume():
+        batch = []
+        while (doc := await queue.get()) is not None:
+            if doc.get("kind") == "error":
+                doc["score"] = 0.0
+                doc["_debug"] = "Error fetching document"
+                unranked.append(doc)
+            elif not doc.get("raw_text", "").strip():
+                doc["score"] = 0.0
+                doc["_debug"] = "No text content available for ranking"
+                unranked.append(doc)
+            else:
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    await rank_batch(batch)
+                    batch = []
+        if batch:
+            await rank_batch(batch)
+    
+    await asyncio.gather(produce(), consume())
+    
+    # Scores from different batches are comparable (same query embedding), so sort them together
+    order = np.argsort(-np.asarray([doc["score"] for doc in ranked], dtype=np.float64), kind="stable")
+    ranked_docs = [ranked[i] for i in order]
+    ranked_docs.extend(unranked)
+    
+    if unranked:
+        print(f"[INFO] {len(unranked)} documents could not be ranked (no text content or errors)")
+    print(f"[OK] Ranked {len(ranked_docs)} documents by relevance to '{topic}'")
+    return ranked_docs
+
 
+def _parse_page(url: str, html: bytes) -> dict:
+    """Extract title, cleaned text, and document kind from a downloaded HTML page."""
     # ================================================
     # Step 3: Parse HTML content
     # ================================================
     # Parse the HTML with BeautifulSoup
-    # 'html.parser' is a built-in parser (no external dependencies)
-    soup = BeautifulSoup(response.text, 'html.parser')
+    # 'lxml' is a C parser: roughly twice as fast as the built-in 'html.parser' with a smaller tree
+    soup = BeautifulSoup(html, 'lxml')
     
     # Remove non-content elements to get clean text
     # Scripts contain JavaScript (not useful for summarization)
@@ -195,13 +604,11 @@ def fetch(url: str, timeout: int = 10) -> dict:
     for tag in soup(['script', 'style', 'nav', 'footer', 'header']):
         tag.decompose()  # Remove the tag from the DOM tree
     
-    # Extract all text content, joining with spaces
-    raw_text = soup.get_text(separator=' ')
+    # Extract text node by node and join the words with single spaces
+    raw_text = ' '.join(word for text in soup.stripped_strings for word in text.split())
     
-    # Normalize whitespace using regex
-    # Replace multiple spaces/tabs/newlines with single space
-    # This makes the text cleaner and more concise
-    raw_text = re.sub(r'\s+', ' ', raw_text).strip()
+    # Keep only as much text as downstream consumers read (summarize() uses the first 6000 chars)
+    raw_text = raw_text[:MAX_TEXT_CHARS]
 
     # ================================================
     # Step 4: Extract title
@@ -257,32 +664,33 @@ def rank_documents(query: str, documents: list, text_key: str = "raw_text") -> l
         ranked = rank_documents("Agentic AI", fetched)
         # ranked[0] is the most relevant paper
     """
-    # Import rank_passages - works from both parent directory and nn_mode directory
-    try:
-        from .nn import rank_passages
-    except ImportError:
-        from nn import rank_passages
+    rank_passages = _get_ranker()
     
-    # Extract text passages from documents
+    # Extract text passages from documents, bucketing unrankable ones in the same pass
     passages = []
     valid_docs = []
+    error_docs = []
     
     for doc in documents:
-        # Skip error documents
         if doc.get("kind") == "error":
+            # Error documents get score of 0.0 and go at the end
+            doc["score"] = 0.0
+            doc["_debug"] = "Error fetching document"
+            error_docs.append(doc)
             continue
         
         # Check if text exists and is not empty/whitespace
         text = doc.get(text_key, "")
         if not text or not text.strip():
+            # Document has no text - assign score of 0 and add debug info
+            doc["score"] = 0.0
+            doc["_debug"] = "No text content available for ranking"
+            error_docs.append(doc)
             continue
         
-        # Truncate very long texts to avoid token limits (E5 max is 512 tokens)
-        # Rough estimate: ~4 chars per token, so 512 tokens ≈ 2000 chars
-        if len(text) > 2000:
-            text = text[:2000] + "..."
-        
-        passages.append(text)
+        # Pre-truncate before tokenizing: shorter inputs mean less tokenizer work and
+        # quadratically cheaper attention in the encoder
+        passages.append(text[:RANK_MAX_CHARS])
         valid_docs.append(doc)
     
     if not passages:
@@ -292,229 +700,18 @@ def rank_documents(query: str, documents: list, text_key: str = "raw_text") -> l
     # Get relevance scores from neural network
     scores = rank_passages(query, passages)
     
-    # Add scores to documents and sort by score
-    for i, doc in enumerate(valid_docs):
-        doc["score"] = scores[i]
+    # Add scores to documents as plain Python floats
+    for doc, score in zip(valid_docs, scores):
+        doc["score"] = float(score)
     
-    # Sort by score (highest first)
-    ranked_docs = sorted(valid_docs, key=lambda x: x["score"], reverse=True)
+    # Sort by score (highest first); ties keep their input order
+    order = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")
+    ranked_docs = [valid_docs[i] for i in order]
     
     # Add unranked error documents at the end (with debug info)
-    # Only include documents that weren't already processed
-    processed_urls = {doc.get("url") for doc in valid_docs}
-    error_docs = []
-    for doc in documents:
-        # Skip if already processed
-        if doc.get("url") in processed_urls:
-            continue
-            
-        # Check if this document should have been processed but wasn't
-        text = doc.get(text_key, "")
-        has_text = text and text.strip()
-        
-        if doc.get("kind") == "error":
-            # Error documents get score of 0.0
-            doc["score"] = 0.0
-            doc["_debug"] = "Error fetching document"
-            error_docs.append(doc)
-        elif not has_text:
-            # Document has no text - assign score of 0 and add debug info
-            doc["score"] = 0.0
-            doc["_debug"] = "No text content available for ranking"
-            error_docs.append(doc)
-    
     ranked_docs.extend(error_docs)
     
     if error_docs:
         print(f"[INFO] {len(error_docs)} documents could not be ranked (no text content or errors)")
     print(f"[OK] Ranked {len(ranked_docs)} documents by relevance to '{query}'")
     return ranked_docs
-
-
-def summarize(raw_text: str, title_guess: str = "Untitled") -> dict:
-    """
-    Generate an AI-powered summary of an academic paper.
-    
-    Uses OpenAI's GPT-4o-mini model to create a structured, concise summary
-    formatted for busy AI practitioners. The summary follows a specific template
-    with sections for Problem, Approach, Results, and Significance.
-    
-    Args:
-        raw_text (str): Full text content of the paper to summarize
-        title_guess (str): Estimated or extracted title of the paper. Default: "Untitled"
-        
-    Returns:
-        dict: Summary result containing:
-            - title (str): Paper title
-            - summary (str): LLM-generated structured summary in markdown format
-            - tokens_in (int): Number of input tokens used (for cost tracking)
-            - tokens_out (int): Number of output tokens used (for cost tracking)
-            
-    Raises:
-        ValueError: If OPENAI_API_KEY is not found in environment variables
-        
-    Note:
-        The function truncates input text to 6000 characters to manage token costs.
-        It automatically retries once on API failures before giving up.
-    """
-    # Retrieve API key from environment variables
-    api_key = os.getenv("OPENAI_API_KEY")
-    
-    # Validate that API key exists
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment or .env file")
-    
-    # Initialize OpenAI client with the API key
-    client = OpenAI(api_key=api_key)
-    
-    # Construct a detailed prompt that instructs the LLM on:
-    # - Target audience (busy Junior AI Intern)
-    # - Required structure (specific headers)
-    # - Format requirements (markdown with bold headers)
-    # - Length constraints (30-50 words per section, 120-180 total)
-    prompt = (
-        f"Summarize the following AI paper for a busy Junior AI Intern. "
-        f"Use EXACTLY this structure with these exact headers:\n\n"
-        f"**Problem:** [description]\n"        # What problem does the paper address?
-        f"**Approach:** [description]\n"        # How did they solve it?
-        f"**Key Results:** [description]\n"     # What did they find?
-        f"**Why It Matters:** [description]\n\n"  # Why is this important?
-        f"Keep each section to 30-50 words. Total 120–180 words.\n\n"
-        f"Title: {title_guess}\n\n{raw_text[:6000]}"  # Truncate to 6000 chars for token efficiency
-    )
-
-    # Attempt 1: Primary API call
-    try:
-        # Make API request to OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",              # Fast and cost-effective model
-            messages=[{"role": "user", "content": prompt}],  # Single user message
-            temperature=0.7,                  # Balance between creativity and consistency
-            max_tokens=300                    # Limit output length to control costs
-        )
-        
-        # Extract the summary text from the response
-        summary = response.choices[0].message.content.strip()
-        
-        # Extract token usage for cost tracking and monitoring
-        tokens_in = response.usage.prompt_tokens   # Tokens in the prompt (input)
-        tokens_out = response.usage.completion_tokens  # Tokens in the completion (output)
-        
-        # Return the result dictionary
-        return {
-            "title": title_guess,
-            "summary": summary,
-            "tokens_in": tokens_in,
-            "tokens_out": tokens_out
-        }
-        
-    except Exception as e:
-        # Attempt 2: Retry on failure
-        # Network issues and rate limits are common - retry once before giving up
-        try:
-            # Make the same request again
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=300
-            )
-            
-            # Extract results
-            summary = response.choices[0].message.content.strip()
-            tokens_in = response.usage.prompt_tokens
-            tokens_out = response.usage.completion_tokens
-            
-            # Return successful result
-            return {
-                "title": title_guess,
-                "summary": summary,
-                "tokens_in": tokens_in,
-                "tokens_out": tokens_out
-            }
-        except:
-            # Final fallback: Return error message
-            # Both attempts failed - return an error result rather than crashing
-            return {
-                "title": title_guess,
-                "summary": "Error summarizing: " + str(e),
-                "tokens_in": 0,
-                "tokens_out": 0
-            }
-
-
-def persist(results: list, folder: str = None):
-    """
-    Save summary results to both markdown and JSONL formats.
-    
-    Creates two output files:
-    1. Markdown report (human-readable) - report_YYYY-MM-DD.md
-    2. JSONL data (machine-readable) - runs_YYYY-MM-DD.jsonl
-    
-    The markdown file is formatted for easy reading by humans.
-    The JSONL file contains one JSON object per line for programmatic processing.
-    
-    Args:
-        results (list): List of summary dictionaries, each containing:
-            - title (str): Paper title
-            - url (str): Paper URL
-            - summary (str): LLM-generated summary
-            - tokens_in (int): Input tokens used
-            - tokens_out (int): Output tokens used
-        folder (str): Directory to save files in. Default: None (auto-detects script directory)
-        
-    Returns:
-        None (files are written to disk)
-        
-    Note:
-        The timestamp is generated using the current date (YYYY-MM-DD format).
-        Files are overwritten if they already exist for the same date.
-        If folder is None, files are saved in the same directory as the calling script.
-    """
-    # If no folder specified, use the directory of the calling script
-    if folder is None:
-        # Get the caller's frame to find where the script is running from
-        caller_frame = inspect.stack()[1]
-        caller_file = caller_frame.filename
-        folder = str(Path(caller_file).parent)
-    
-    # Generate timestamp for filename (YYYY-MM-DD format)
-    timestamp = datetime.now().strftime("%Y-%m-%d")
-    
-    # Create output directory if needed
-    os.makedirs(folder, exist_ok=True)
-    
-    # Write markdown report
-    md_path = os.path.join(folder, f"report_{timestamp}.md")
-    
-    with open(md_path, "w", encoding="utf-8") as f:
-        # Write header
-        f.write(f"# Weekly AI Paper Brief – {timestamp}\n\n")
-        
-        # Write each paper summary
-        for i, r in enumerate(results, 1):
-            # Paper header with index and title
-            f.write(f"### {i}) {r['title']}\n")
-            
-            # URL link
-            f.write(f"{r['url']}\n\n")
-            
-            # Summary content (already formatted by LLM)
-            f.write(f"{r['summary']}\n\n")
-            
-            # Separator line
-            f.write("---\n\n")
-    
-    # Write JSONL data file
-    # JSONL (JSON Lines) format: one JSON object per line
-    jsonl_path = os.path.join(folder, f"runs_{timestamp}.jsonl")
-    
-    with open(jsonl_path, "w", encoding="utf-8") as f:
-        for r in results:
-            # Write each result as a separate line of JSON
-            # ensure_ascii=False allows UTF-8 characters to be written as-is
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
-    
-    # Print confirmation
-    print(f"Saved report: {md_path}")
-    print(f"Saved raw data: {jsonl_path}")
\ No newline at end of file
@@ -1,6 +1,8 @@
+import hashlib
 import json
+import time
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
+from nn_mode._embed import get_model
 
 ROOT = Path("c:/Users/ehsan/Documents/practicingAI/agenticAI/agentic_ai_tutor")
 KB_DIR = ROOT / "knowledge_base"
@@ -10,9 +12,8 @@ INDEX_PATH = KB_DIR / "embeddings" / "kb_index.json"
 def reembed():
     print("Starting re-embedding process...")
     
-    # Initialize model
-    print("Loading model intfloat/e5-base-v2...")
-    model = SentenceTransformer("intfloat/e5-base-v2")
+    # Initialize model (shared, cached loader; picks cuda/mps/cpu automatically)
+    model = get_model("intfloat/e5-base-v2")
     
     # Load existing index to preserve IDs/titles if possible
     existing_index = []
@@ -36,32 +37,56 @@ def reembed():
     files = list(NOTES_DIR.glob("*.md"))
     print(f"Found {len(files)} notes to embed.")
     
+    # First pass: read every note. Notes whose content hash matches the stored record keep their
+    # embedding; new or changed notes are queued for one batched encode call below
+    texts = []
+    pending = []  # Positions in new_index still waiting for an embedding
     for file_path in files:
         try:
             content = file_path.read_text(encoding="utf-8")
-            rel_path = f"knowledge_base/notes/{file_path.name}"
-            
-            # Generate embedding
-            # e5 models expect "query: " or "passage: " prefix, but for symmetric search or general usage
-            # usually "passage: " is used for documents.
-            # However, standard usage often omits if not strictly retrieval task.
-            # Let's follow standard usage: "passage: " for docs, "query: " for queries.
-            embedding = model.encode(f"passage: {content}").tolist()
-            
-            # Reuse ID/Title if available
-            record = existing_map.get(rel_path, {})
-            
-            new_record = {
-                "id": record.get("id", file_path.stem),
-                "title": record.get("title", file_path.stem.replace("-", " ").title()),
-                "note_path": rel_path,
-                "embedding": embedding
-            }
-            new_index.append(new_record)
-            print(f"Processed {file_path.name}")
-            
         except Exception as e:
             print(f"Error processing {file_path.name}: {e}")
+            continue
+        
+        rel_path = f"knowledge_base/notes/{file_path.name}"
+        content_hash = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        
+        # Unchanged since the last run: reuse the existing record as-is
+        prev = existing_map.get(rel_path)
+        if prev and prev.get("sha1") == content_hash and "embedding" in prev:
+            new_index.append(prev)
+            continue
+        
+        # Reuse ID/Title if available
+        record = prev or {}
+        
+        new_index.append({
+            "id": record.get("id", file_path.stem),
+            "title": record.get("title", file_path.stem.replace("-", " ").title()),
+            "note_path": rel_path,
+            "sha1": content_hash,
+            "embedding": None  # Filled in after the batched encode
+        })
+        pending.append(len(new_index) - 1)
+        
+        # e5 models expect "query: " or "passage: " prefix, but for symmetric search or general usage
+        # usually "passage: " is used for documents.
+        # However, standard usage often omits if not strictly retrieval task.
+        # Let's follow standard usage: "passage: " for docs, "query: " for queries.
+        texts.append(f"passage: {content}")
+    
+    print(f"{len(texts)} new or changed notes, {len(new_index) - len(texts)} unchanged.")
+    
+    if texts:
+        # Generate all embeddings at once: batched forward passes instead of one per note
+        start = time.perf_counter()
+        embeddings = model.encode(texts, batch_size=32, show_progress_bar=True, convert_to_numpy=True)
+        print(f"Embedded {len(texts)} notes in {time.perf_counter() - start:.2f}s on {model.device}")
+        
+        # Second pass: attach each embedding to its note's record
+        for i, embedding in zip(pending, embeddings.tolist()):
+            new_index[i]["embedding"] = embedding
+            print(f"Processed {Path(new_index[i]['note_path']).name}")
             
     # Save new index
     INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
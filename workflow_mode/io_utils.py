@@ -7,7 +7,7 @@ This module handles:
 3. Saving summarized results to markdown and JSONL formats
 
 Features:
-- BeautifulSoup for HTML parsing and text extraction
+- BeautifulSoup (lxml backend) for HTML parsing and text extraction
 - Automatic PDF-to-abstract page redirection
 - Text cleaning and whitespace normalization
 - Dual format output (human-readable markdown + machine-readable JSONL)
@@ -15,57 +15,125 @@ Features:
 
 # Import required libraries
 import requests           # For HTTP requests to fetch web content
-from bs4 import BeautifulSoup  # HTML parsing and text extraction
+import httpx              # Async HTTP/2 client used by fetch_async()
+import asyncio            # Event loop access for handing parsing to the thread pool
+from concurrent.futures import ThreadPoolExecutor  # Worker threads for HTML parsing
+from requests.adapters import HTTPAdapter  # Connection pool settings for the shared session
+from urllib3.util.retry import Retry       # Automatic retries for transient connection errors
+from bs4 import BeautifulSoup, SoupStrainer  # HTML parsing and text extraction
 import re                # Regular expressions for text processing
+import html              # Unescaping entities in arXiv meta tag contents
+import diskcache         # On-disk cache of parsed pages across runs
 from pathlib import Path         # Path manipulation utilities
-from dotenv import load_dotenv   # Environment variable loading
 from datetime import datetime    # Date/time formatting for filenames
-import json             # JSON serialization for data export
+import orjson           # Fast JSON serialization for data export
+import gzip             # Compressed JSONL fallback when zstandard is missing
 import os               # File system operations
-import inspect          # For detecting caller's file location
+import sys              # For detecting caller's file location (sys._getframe)
 
-# Load .env file from parent directory (project root)
-# This allows access to environment variables like API keys
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(env_path)
+# Shared HTTP session: keeps the arxiv.org connection alive across fetch() calls,
+# so every paper after the first skips the TCP/TLS handshake
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=Retry(total=2, backoff_factor=0.2))
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.mount('http://', _ADAPTER)
 
-def fetch(url: str, timeout: int = 10) -> dict:
+# Whitespace-run pattern used to normalize page text, compiled once at import
+_WS_RE = re.compile(r'\s+')
+
+# Only the tags that carry the title and body text are turned into BeautifulSoup objects;
+# sidebars, scripts, and other top-level chrome are skipped while parsing instead of built and discarded
+_CONTENT_STRAINER = SoupStrainer(['title', 'h1', 'p', 'div', 'article', 'main', 'blockquote'])
+
+# arXiv abstract pages carry the paper title and abstract in citation meta tags;
+# matching them on the raw bytes skips BeautifulSoup for those pages entirely
+_CITATION_TITLE_RE = re.compile(rb'<meta name="citation_title" content="([^"]*)"')
+_CITATION_ABSTRACT_RE = re.compile(rb'<meta name="citation_abstract" content="([^"]*)"')
+
+# arXiv PDF link: an arxiv.org host, then /pdf/<id> with an optional .pdf suffix anchored at the end of the URL
+# (other hosts' /pdf/ paths have no /abs/ counterpart, so they must never match)
+_PDF_RE = re.compile(r'^(https?://(?:www\.|export\.)?arxiv\.org)/pdf/(.+?)(?:\.pdf)?$')
+_PDF_CONTENT_TYPE = 'application/pdf'
+
+# Largest page body we download: anything bigger is not an abstract page and would only bloat the parse
+MAX_PAGE_BYTES = 2_000_000
+_CHUNK_SIZE = 64 * 1024
+
+# One markdown report entry: paper header with index and title, URL link,
+# summary content (already formatted by LLM), and separator line
+_ENTRY_TMPL = "### {i}) {title}\n{url}\n\n{summary}\n\n---\n\n"
+
+# On-disk cache of parsed pages, keyed by URL: reruns skip both the download and the parse
+_HTTP_CACHE_DIR = Path(__file__).parent / "_http_cache"
+_http_cache = None
+FETCH_CACHE_TTL = 12 * 3600   # Abstract pages rarely change within a working session
+
+# HTTP/2 lets concurrent fetch_async() calls to arxiv.org share one connection;
+# httpx needs the optional h2 package for it and speaks HTTP/1.1 without
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# Thread pool that fetch_async() hands HTML parsing to (created on first use)
+PARSE_WORKERS = 8
+_PARSE_POOL = None
+
+
+def _get_http_cache() -> diskcache.Cache:
+    """Lazy open the on-disk fetch cache (only open once)."""
+    global _http_cache
+    if _http_cache is None:
+        _http_cache = diskcache.Cache(str(_HTTP_CACHE_DIR))
+    return _http_cache
+
+
+def fetch(url: str, timeout: int = 10, min_length: int = 0) -> dict:
     """
     Fetch and extract text content from a web URL.
     
     Downloads HTML content from the given URL, extracts clean text,
-    and returns metadata about the document. Handles PDF links by
+    and returns metadata about the document. Handles arXiv PDF links by
     automatically redirecting to the abstract page.
     
     Args:
         url (str): URL of the page to fetch
         timeout (int): Request timeout in seconds. Default: 10
+        min_length (int): Pages whose raw HTML is shorter than this many bytes are rejected
+            before parsing (their text can only be shorter). Default: 0 (no check)
         
     Returns:
         dict: Document data containing:
             - title (str): Extracted or guessed title
             - url (str): Original URL
             - raw_text (str): Cleaned text content
-            - kind (str): Document type ("html", "arxiv_abs", or "error")
+            - kind (str): Document type ("html", "arxiv_abs", "too_short", or "error")
             - error (str): Error message (only present if kind="error")
             
     Note:
-        PDF URLs are automatically converted to abstract page URLs.
+        arXiv PDF URLs are automatically converted to abstract page URLs; other PDFs
+        return an error result (there is no abstract page to fall back to).
         Scripts, styles, and navigation elements are stripped from HTML.
+        Successfully parsed pages are cached on disk for FETCH_CACHE_TTL seconds.
     """
-    # Set User-Agent header to identify our bot
-    # This helps servers handle our requests appropriately
-    headers = {'User-Agent': 'Mozilla/5.0 (compatible; workflow-bot)'}
+    # arXiv papers can be accessed via PDF or abstract page
+    # We prefer abstract pages as they have more metadata, so rewrite PDF links before requesting anything
+    # Only arXiv hosts have that /pdf/ -> /abs/ mapping; every other URL is left as given
+    if 'arxiv.org/pdf/' in url:
+        url = _to_abs_url(url)
     
+    # Serve repeat URLs from the disk cache (no request, no parse)
+    cache_key = f"fetch:{url}"
+    cached = _get_http_cache().get(cache_key)
+    if cached is not None:
+        return cached
+
     # ================================================
-    # Step 1: Fetch the URL with error handling
+    # Steps 1-2: Download the page
     # ================================================
     try:
-        # Make GET request with timeout to prevent hanging
-        response = requests.get(url, headers=headers, timeout=timeout)
-        
-        # Raise exception if HTTP status code indicates error (4xx, 5xx)
-        response.raise_for_status()
+        url, body, encoding = _download(url, timeout)
     except Exception as e:
         # Return error dictionary if fetch fails
         # This allows the pipeline to continue processing other papers
@@ -77,41 +145,228 @@ def fetch(url: str, timeout: int = 10) -> dict:
             "error": str(e)
         }
 
+    # Cheap pre-filter: extracted text is never longer than the HTML it came from,
+    # so a page below min_length bytes can't pass the caller's length check - skip the parse
+    if len(body) < min_length:
+        return _too_short(url, body)
+
     # ================================================
-    # Step 2: Handle PDF links (redirect to abstract page)
+    # Steps 3-6: Parse HTML into the document dict
     # ================================================
-    # arXiv papers can be accessed via PDF or abstract page
-    # We prefer abstract pages as they have more metadata
-    if url.endswith('.pdf') or 'pdf' in response.headers.get('Content-Type', ''):
-        # Convert PDF URL to abstract page URL
-        # Example: https://arxiv.org/pdf/2405.12345.pdf -> https://arxiv.org/abs/2405.12345
-        abs_url = url.replace('/pdf/', '/abs/').replace('.pdf', '')
+    doc = _parse_page(url, body, encoding)
+    _get_http_cache().set(cache_key, doc, expire=FETCH_CACHE_TTL)
+    return doc
+
+
+def _to_abs_url(url: str) -> str:
+    """Map an arXiv PDF link to its abstract page (https://arxiv.org/pdf/2405.12345.pdf -> https://arxiv.org/abs/2405.12345)."""
+    # Pure string rewrite, so PDF links never cost a request of their own
+    # One anchored substitution: '.pdf' elsewhere in the URL (e.g. a version like foo.v2.pdf) is left alone
+    return _PDF_RE.sub(r'\1/abs/\2', url)
+
+
+def _download(url: str, timeout: int = 10) -> tuple:
+    """
+    Download an HTML page (arXiv PDF links should already be rewritten with _to_abs_url()).
+    
+    Args:
+        url (str): URL of the page to fetch
+        timeout (int): Request timeout in seconds. Default: 10
+        
+    Returns:
+        tuple: (final_url, body_bytes, declared_charset_or_None)
+        
+    Raises:
+        requests.RequestException: On connection errors or 4xx/5xx responses
+        ValueError: If the response is a PDF or the body is larger than MAX_PAGE_BYTES
+    """
+    # Set User-Agent header to identify our bot
+    # This helps servers handle our requests appropriately
+    headers = {'User-Agent': 'Mozilla/5.0 (compatible; workflow-bot)'}
+    
+    # Make GET request with timeout to prevent hanging (pooled connection via the shared session)
+    # stream=True defers the body download so it can be read under MAX_PAGE_BYTES (or skipped for PDFs)
+    response = _SESSION.get(url, headers=headers, timeout=timeout, stream=True)
+    
+    # Raise exception if HTTP status code indicates error (4xx, 5xx)
+    if not response.ok:
+        response.close()
+    response.raise_for_status()
+
+    # Any PDF still reaching this point has no abstract page to fall back to (not an arXiv /pdf/ link)
+    content_type = response.headers.get('Content-Type', '')
+    if url.endswith('.pdf') or content_type.startswith(_PDF_CONTENT_TYPE):
+        response.close()  # Drop the PDF body unread
+        raise ValueError("PDF content is not supported")
+
+    # Pass the server's declared charset along (requests' ISO-8859-1 fallback for undeclared text/* is not trusted)
+    declared = 'charset=' in content_type.lower()
+    encoding = response.encoding if declared else None
+    
+    # Read the body in chunks, giving up as soon as it passes the size cap
+    chunks = []
+    total = 0
+    with response:
+        for chunk in response.iter_content(_CHUNK_SIZE):
+            total += len(chunk)
+            if total > MAX_PAGE_BYTES:
+                raise ValueError(f"too_large: page exceeds {MAX_PAGE_BYTES} bytes")
+            chunks.append(chunk)
+    return url, b''.join(chunks), encoding
+
+
+def make_async_client(max_connections: int = 20, max_keepalive: int = 10) -> httpx.AsyncClient:
+    """
+    Build the shared async client for fetch_async().
+    
+    Args:
+        max_connections (int): Upper bound on open connections. Default: 20
+        max_keepalive (int): Idle connections kept open for reuse. Default: 10
         
-        # Recursively call fetch with the abstract page URL
-        # This ensures we get HTML content, not PDF binary data
-        return fetch(abs_url)
+    Returns:
+        httpx.AsyncClient: HTTP/2-enabled (when h2 is installed) client that follows redirects
+    """
+    return httpx.AsyncClient(
+        http2=_HTTP2,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+        headers={'User-Agent': 'Mozilla/5.0 (compatible; workflow-bot)'},
+        follow_redirects=True,
+    )
+
 
+async def fetch_async(client: httpx.AsyncClient, url: str, timeout: int = 10,
+                      min_length: int = 0) -> dict:
+    """
+    Async version of fetch() for use with a shared client from make_async_client().
+    
+    Args:
+        client (httpx.AsyncClient): Client to issue the request on
+        url (str): URL of the page to fetch
+        timeout (int): Request timeout in seconds. Default: 10
+        min_length (int): Minimum raw HTML size in bytes (see fetch()). Default: 0
+        
+    Returns:
+        dict: Document data (see fetch())
+    """
+    # Rewrite arXiv PDF links up front, as in fetch()
+    if 'arxiv.org/pdf/' in url:
+        url = _to_abs_url(url)
+    
+    # Same disk cache as fetch(); the lookup is a local SQLite read, cheap enough to do inline
+    cache_key = f"fetch:{url}"
+    cached = _get_http_cache().get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        async with client.stream('GET', url, timeout=timeout) as response:
+            response.raise_for_status()
+            
+            # Non-arXiv PDF: nothing to parse, and no abstract page to fall back to
+            if url.endswith('.pdf') or response.headers.get('Content-Type', '').startswith(_PDF_CONTENT_TYPE):
+                raise ValueError("PDF content is not supported")
+            
+            # Read in chunks under the same size cap as _download()
+            chunks = []
+            total = 0
+            async for chunk in response.aiter_bytes(_CHUNK_SIZE):
+                total += len(chunk)
+                if total > MAX_PAGE_BYTES:
+                    raise ValueError(f"too_large: page exceeds {MAX_PAGE_BYTES} bytes")
+                chunks.append(chunk)
+            body = b''.join(chunks)
+            encoding = response.charset_encoding  # Declared charset only (None if the server sent none)
+    except Exception as e:
+        return {"title": "Error", "url": url, "raw_text": "", "kind": "error", "error": str(e)}
+    
+    # Same pre-filter as fetch(): too little HTML to hold min_length characters of text
+    if len(body) < min_length:
+        return _too_short(url, body)
+    
+    # Parse on the worker pool so this page's parse overlaps the downloads still in flight
+    # (lxml does its parsing in C without holding the GIL)
+    loop = asyncio.get_running_loop()
+    doc = await loop.run_in_executor(_get_parse_pool(), _parse_page, url, body, encoding)
+    _get_http_cache().set(cache_key, doc, expire=FETCH_CACHE_TTL)
+    return doc
+
+
+def _too_short(url: str, body: bytes) -> dict:
+    """Document dict for a page rejected by the min_length pre-filter (not cached)."""
+    return {
+        "title": "Too short",
+        "url": url,
+        "raw_text": "",
+        "kind": "too_short",
+        "error": f"page is only {len(body)} bytes"
+    }
+
+
+def _parse_arxiv_abs(url: str, body: bytes, encoding: str = None) -> dict:
+    """
+    Read title and abstract from an arXiv abstract page's citation meta tags.
+    
+    Args:
+        url (str): Page URL
+        body (bytes): Raw HTML
+        encoding (str): Declared charset, or None for UTF-8 (arXiv's encoding)
+        
+    Returns:
+        dict: Document data with the abstract as raw_text, or None if either tag is missing
+              (the caller then falls back to the full BeautifulSoup parse)
+    """
+    title_match = _CITATION_TITLE_RE.search(body)
+    abstract_match = _CITATION_ABSTRACT_RE.search(body)
+    if title_match is None or abstract_match is None:
+        return None
+    
+    charset = encoding or 'utf-8'
+    title = html.unescape(title_match.group(1).decode(charset, 'replace'))
+    abstract = html.unescape(abstract_match.group(1).decode(charset, 'replace'))
+    return {
+        "title": _WS_RE.sub(' ', title).strip(),
+        "url": url,
+        "raw_text": _WS_RE.sub(' ', abstract).strip(),
+        "kind": "arxiv_abs"
+    }
+
+
+def _get_parse_pool() -> ThreadPoolExecutor:
+    """Return the shared HTML parsing thread pool, creating it on first use."""
+    global _PARSE_POOL
+    if _PARSE_POOL is None:
+        _PARSE_POOL = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix='parse')
+    return _PARSE_POOL
+
+
+def _parse_page(url: str, body: bytes, encoding: str = None) -> dict:
+    """Extract title, cleaned text, and document kind from a downloaded HTML page."""
+    # Fast path: arXiv abstract pages only need their title and abstract, both in meta tags
+    # (also keeps the sidebar/reference text out of the summarize prompt)
+    if 'arxiv.org/abs/' in url:
+        doc = _parse_arxiv_abs(url, body, encoding)
+        if doc is not None:
+            return doc
+    
     # ================================================
     # Step 3: Parse HTML content
     # ================================================
     # Parse the HTML with BeautifulSoup
-    # 'html.parser' is a built-in parser (no external dependencies)
-    soup = BeautifulSoup(response.text, 'html.parser')
+    # 'lxml' is a C parser: several times faster than the built-in 'html.parser' with lower peak memory
+    # Raw bytes go straight to lxml with a known charset, so no encoding detection runs:
+    # the server's declared charset, else UTF-8 (what the lxml builder settles on for undeclared pages anyway)
+    soup = BeautifulSoup(body, 'lxml', from_encoding=encoding or 'utf-8', parse_only=_CONTENT_STRAINER)
     
     # Remove non-content elements to get clean text
+    # (only those nested inside the strained content tags are still present at this point)
     # Scripts contain JavaScript (not useful for summarization)
     # Styles contain CSS (not useful for summarization)
     # Nav, footer, header contain navigation/metadata (not paper content)
     for tag in soup(['script', 'style', 'nav', 'footer', 'header']):
         tag.decompose()  # Remove the tag from the DOM tree
     
-    # Extract all text content, joining with spaces
-    raw_text = soup.get_text(separator=' ')
-    
-    # Normalize whitespace using regex
-    # Replace multiple spaces/tabs/newlines with single space
-    # This makes the text cleaner and more concise
-    raw_text = re.sub(r'\s+', ' ', raw_text).strip()
+    # Extract text node by node and join the words with single spaces
+    raw_text = ' '.join(word for text in soup.stripped_strings for word in text.split())
 
     # ================================================
     # Step 4: Extract title
@@ -142,7 +397,23 @@ def fetch(url: str, timeout: int = 10) -> dict:
     }
 
 
-def persist(results: list, folder: str = None):
+def _write_compressed(path: str, payload: bytes) -> str:
+    """Write payload zstd-compressed to path + '.zst' (gzip to path + '.gz' without zstandard); returns the path written."""
+    try:
+        import zstandard  # Optional dependency, only needed for compressed output
+    except ImportError:
+        path += ".gz"
+        with gzip.open(path, "wb", compresslevel=6) as f:
+            f.write(payload)
+        return path
+    
+    path += ".zst"
+    with open(path, "wb") as raw, zstandard.ZstdCompressor(level=3).stream_writer(raw) as f:
+        f.write(payload)
+    return path
+
+
+def persist(results: list, folder: str = None, compress: bool = False):
     """
     Save summary results to both markdown and JSONL formats.
     
@@ -160,7 +431,10 @@ def persist(results: list, folder: str = None):
             - summary (str): LLM-generated summary
             - tokens_in (int): Input tokens used
             - tokens_out (int): Output tokens used
+            - sections (dict, optional): Summary split by header (written to the JSONL only)
         folder (str): Directory to save files in. Default: None (auto-detects script directory)
+        compress (bool): Write the JSONL compressed, as runs_YYYY-MM-DD.jsonl.zst (zstandard level 3),
+            or .jsonl.gz when zstandard isn't installed. Default: False
         
     Returns:
         None (files are written to disk)
@@ -176,8 +450,7 @@ def persist(results: list, folder: str = None):
     # If no folder specified, use the directory of the calling script
     if folder is None:
         # Get the caller's frame to find where the script is running from
-        caller_frame = inspect.stack()[1]
-        caller_file = caller_frame.filename
+        caller_file = sys._getframe(1).f_code.co_filename
         folder = str(Path(caller_file).parent)
     
     # ================================================
@@ -200,24 +473,13 @@ def persist(results: list, folder: str = None):
     # Construct filename with timestamp
     md_path = os.path.join(folder, f"report_{timestamp}.md")
     
+    # Build the whole report in memory and write it with one call (instead of 4 writes per paper)
+    parts = [f"# Weekly AI Paper Brief – {timestamp}\n\n"]  # Header
+    parts.extend(_ENTRY_TMPL.format_map({**r, 'i': i}) for i, r in enumerate(results, 1))
+    
     # Open file in write mode with UTF-8 encoding (supports international characters)
     with open(md_path, "w", encoding="utf-8") as f:
-        # Write header
-        f.write(f"# Weekly AI Paper Brief – {timestamp}\n\n")
-        
-        # Write each paper summary
-        for i, r in enumerate(results, 1):
-            # Paper header with index and title
-            f.write(f"### {i}) {r['title']}\n")
-            
-            # URL link
-            f.write(f"{r['url']}\n\n")
-            
-            # Summary content (already formatted by LLM)
-            f.write(f"{r['summary']}\n\n")
-            
-            # Separator line
-            f.write("---\n\n")
+        f.write(''.join(parts))
     
     # ================================================
     # Step 5: Write JSONL data file
@@ -226,12 +488,15 @@ def persist(results: list, folder: str = None):
     # This format is common in data science and ML pipelines
     jsonl_path = os.path.join(folder, f"runs_{timestamp}.jsonl")
     
-    # Open file in write mode with UTF-8 encoding
-    with open(jsonl_path, "w", encoding="utf-8") as f:
-        for r in results:
-            # Write each result as a separate line of JSON
-            # ensure_ascii=False allows UTF-8 characters to be written as-is
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    # Serialize every result as a separate line of JSON, then write the payload once
+    # orjson emits UTF-8 bytes directly (no ensure_ascii juggling), so the file is written in binary mode
+    payload = b"".join(orjson.dumps(r) + b"\n" for r in results)
+    
+    if compress:
+        jsonl_path = _write_compressed(jsonl_path, payload)
+    else:
+        with open(jsonl_path, "wb") as f:
+            f.write(payload)
     
     # ================================================
     # Step 6: Print confirmation
@@ -12,9 +12,50 @@ The pipeline processes papers to create weekly briefs for AI practitioners.
 
 # Import local modules
 from search import search      # Search function for arXiv API
-from io_utils import fetch, persist  # Fetch content from URLs and save results
-from summarize import summarize      # Summarize paper content with LLM
+from io_utils import fetch_async, make_async_client, persist  # Fetch content from URLs and save results
+from summarize import summarize_many  # Summarize paper content with LLM
 import json                       # JSON handling for data serialization
+import asyncio                    # Runs the page fetches concurrently
+import re                         # Version-suffix stripping for candidate dedupe
+from pathlib import Path          # Locating the project-root .env file
+from dotenv import load_dotenv    # Environment variable loading
+
+# arXiv version suffix on a paper ID ("2405.12345v2" -> "2405.12345")
+_VERSION_RE = re.compile(r'v\d+$')
+
+# Fetch concurrency limits: open connections, idle connections kept warm, and in-flight fetch() calls
+FETCH_MAX_CONNECTIONS = 20
+FETCH_MAX_KEEPALIVE = 10
+FETCH_CONCURRENCY = 8
+
+# Concurrent summarize requests (kept under the OpenAI rate limit)
+SUMMARIZE_CONCURRENCY = 5
+
+# Documents with less text than this are error/redirect pages rather than papers
+MIN_DOC_CHARS = 600
+
+
+async def fetch_all(urls: list) -> list:
+    """
+    Fetch all URLs concurrently over one pooled HTTP/2 client.
+    
+    Args:
+        urls (list): URLs to fetch
+        
+    Returns:
+        list: Document dicts from fetch_async(), in the same order as urls
+    """
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+    
+    # With HTTP/2 the arxiv.org requests are multiplexed over a single TCP/TLS connection
+    async with make_async_client(FETCH_MAX_CONNECTIONS, FETCH_MAX_KEEPALIVE) as client:
+        async def bounded(url):
+            async with semaphore:
+                return await fetch_async(client, url, min_length=MIN_DOC_CHARS)
+        
+        # fetch_async() turns failures into error dicts, so one bad URL can't cancel the rest
+        return await asyncio.gather(*(bounded(url) for url in urls))
+
 
 def main():
     """
@@ -28,6 +69,10 @@ def main():
     """
     print("Starting AI Paper Pipeline...\n")
     
+    # Load .env file from parent directory (project root) once per run
+    # This allows access to environment variables like API keys
+    load_dotenv(Path(__file__).parent.parent / '.env')
+    
     # ========================================
     # STEP 1: Search for trending AI papers
     # ========================================
@@ -42,6 +87,17 @@ def main():
         print("No results found. Check internet or search.py")
         return
     
+    # Drop repeats of the same paper (e.g. /abs/2405.12345 and /abs/2405.12345v2)
+    # before any fetch or LLM work is spent on them
+    seen = set()
+    unique = []
+    for c in candidates:
+        paper_key = _VERSION_RE.sub('', c["url"].rsplit('/', 1)[-1])
+        if paper_key not in seen:
+            seen.add(paper_key)
+            unique.append(c)
+    candidates = unique
+    
     print(f"   Found {len(candidates)} candidates\n")
     
     # ========================================
@@ -50,22 +106,28 @@ def main():
     print("2. Fetching content...")
     docs = []  # Will store successfully fetched documents
     
-    # Iterate through each candidate paper
-    for c in candidates:
+    # Fetch all candidate pages concurrently
+    # This downloads HTML, extracts text, and gets metadata for every paper at once
+    fetched = asyncio.run(fetch_all([c["url"] for c in candidates]))
+    
+    # Filter the results in the original candidate order
+    for c, doc in zip(candidates, fetched):
         print(f"   → {c['title'][:160]}...")  # Print first 160 chars of title
         
-        # Fetch the paper content from the URL
-        # This downloads HTML, extracts text, and gets metadata
-        doc = fetch(c["url"])
-        
         # Skip if fetch failed (network error, 404, etc.)
         if doc.get("kind") == "error":
             print(f"      Failed: {doc.get('error', 'Unknown')}")
             continue
         
+        # Skip pages fetch_async() already rejected as too small to parse
+        if doc.get("kind") == "too_short":
+            print(f"      Skipped: too short ({doc['error']})")
+            continue
+        
         # Filter out documents that are too short
         # This eliminates error pages, redirect pages, and non-paper content
-        if len(doc["raw_text"]) < 600:
+        # (arxiv_abs text is just the abstract from the page's meta tags, which is a real paper even when brief)
+        if doc["kind"] != "arxiv_abs" and len(doc["raw_text"]) < MIN_DOC_CHARS:
             print(f"      Skipped: too short ({len(doc['raw_text'])} chars)")
             continue
         
@@ -80,21 +142,23 @@ def main():
     print("3. Summarizing with LLM...")
     results = []  # Will store summarization results
     
-    # Process each document and generate a summary
     for i, d in enumerate(docs, 1):
         print(f"   [{i}/{len(docs)}] {d['title'][:50]}...")
-        
-        # Generate summary using OpenAI API
-        # The summary includes: Problem, Approach, Key Results, Why It Matters
-        s = summarize(d["raw_text"], title_guess=d["title"])
-        
+    
+    # Generate all summaries concurrently using OpenAI API
+    # The summary includes: Problem, Approach, Key Results, Why It Matters
+    summaries = asyncio.run(summarize_many(docs, concurrency=SUMMARIZE_CONCURRENCY))
+    
+    # Pair each document with its summary
+    for d, s in zip(docs, summaries):
         # Build the result object with all relevant information
         result = {
             "title": d["title"],                    # Paper title
             "url": d["url"],                        # Source URL
-            "summary": s["summary"],                # LLM-generated summary
-            "tokens_in": s["tokens_in"],            # Token usage for API call (input)
-            "tokens_out": s["tokens_out"]           # Token usage for API call (output)
+            "summary": s.summary,                   # LLM-generated summary
+            "tokens_in": s.tokens_in,               # Token usage for API call (input)
+            "tokens_out": s.tokens_out,             # Token usage for API call (output)
+            "sections": dict(s.sections)            # Summary split by header (JSONL only)
         }
         results.append(result)
     
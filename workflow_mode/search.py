@@ -14,9 +14,18 @@ Features:
 # Import required libraries
 import requests                           # For making HTTP requests to arXiv API
 import json                               # JSON handling (though this file primarily uses XML)
-import xml.etree.ElementTree as ET        # For parsing arXiv's XML response format
+try:
+    from lxml import etree as ET          # libxml2-backed C parser for arXiv's XML response format
+except ImportError:
+    import xml.etree.ElementTree as ET    # Standard library fallback (same iterfind/findtext API)
 from datetime import datetime, timedelta  # Date utilities (currently not used but available for future features)
 
+# Clark-notation Atom tags: lookups skip the per-call namespace-prefix expansion
+_ATOM = '{http://www.w3.org/2005/Atom}'
+_ATOM_ENTRY = _ATOM + 'entry'
+_ATOM_TITLE = _ATOM + 'title'
+_ATOM_ID = _ATOM + 'id'
+
 # Configuration flag for switching between real and mock search
 # Set to False to use hardcoded test data when offline or testing
 USE_REAL_SEARCH = True  # Change to False to use mock data
@@ -100,28 +109,22 @@ def search(topic: str = "Agentic AI", limit: int = 3):
         # arXiv returns data in XML/Atom format
         root = ET.fromstring(response.content)
         
-        # Define the Atom namespace used by arXiv XML
-        # This is needed to properly extract elements from the XML tree
-        ns = {'atom': 'http://www.w3.org/2005/Atom'}
-        
         results = []
         
         # Iterate through each paper entry in the XML
-        for entry in root.findall('atom:entry', ns):
+        # iterfind yields entries lazily instead of building a list first
+        for entry in root.iterfind(_ATOM_ENTRY):
             # Extract title: remove whitespace and formatting
-            title = entry.find('atom:title', ns).text.strip()
+            # findtext returns the text directly without wrapping the child element
+            title = entry.findtext(_ATOM_TITLE, '').strip()
             
             # Extract arXiv paper ID from the URL
             # Example: "http://arxiv.org/abs/2405.12345" -> "2405.12345"
-            paper_id = entry.find('atom:id', ns).text.split('/')[-1]
+            paper_id = entry.findtext(_ATOM_ID, '').split('/')[-1]
             
             # Construct the abstract page URL
             url = f"https://arxiv.org/abs/{paper_id}"
             
-            # Try to extract abstract if available
-            abstract = entry.find('atom:summary', ns)
-            abstract_text = abstract.text.strip() if abstract is not None else "No abstract available"
-            
             # Build result dictionary
             results.append({
                 "title": title,      # Paper title
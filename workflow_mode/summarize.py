@@ -7,26 +7,610 @@ Summaries are formatted for busy practitioners who need quick insights.
 Features:
 - Structured output (Problem, Approach, Results, Why It Matters)
 - Token usage tracking for cost monitoring
-- Automatic retry on API failures
+- Automatic retry with exponential backoff on transient API failures
 - Content truncation for token efficiency
+- Semantic cache: near-duplicate papers reuse an earlier summary
+- Async batch summarization (summarize_many) on AsyncOpenAI
+- Multi-paper requests in JSON mode (summarize_batch)
 """
 
 # Import required libraries
-from openai import OpenAI      # OpenAI Python SDK for LLM API calls
+# openai (plus the httpx/pydantic stack under it) and python-dotenv are imported on first use in
+# _get_client()/_get_async_client(), so importing this module stays cheap when nothing is summarized
+from typing import TYPE_CHECKING  # OpenAI client types for annotations without the import
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception  # Backoff retries
+import asyncio                  # Concurrent summaries in summarize_many()
+import weakref                  # Per-event-loop AsyncOpenAI clients
 import os                       # Environment variable access
 from pathlib import Path        # Path manipulation
-from dotenv import load_dotenv  # Load .env file for configuration
+import functools                # Once-per-process setup (functools.cache)
+import hashlib                  # Hashing prompts into memo keys
+import re                       # Boilerplate patterns stripped from paper text
+from collections import Counter, OrderedDict  # Boilerplate phrase counts; in-process LRU memo of summaries
+import orjson                   # Fast JSON for the semantic cache sidecar, the disk cache, and batch requests
+import threading                # Guards the memo and counters across concurrent summarize() threads
+import sys                      # Project root on the import path for the shared semantic cache store
+import numpy as np              # Semantic cache similarity search
+import diskcache                # Persistent exact-match cache of summaries
+import zlib                     # Response cache compression when zstandard is missing
+from dataclasses import dataclass, field  # Typed summary results
+from types import MappingProxyType  # Read-only view for SummaryResult.sections
 
-# Load environment variables from .env file in project root
+# The semantic cache's journal/compaction store is shared with nn_mode: make the project root importable
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(_PROJECT_ROOT))
+from nn_mode._semantic_cache import SemanticStore
+
+if TYPE_CHECKING:
+    from openai import OpenAI, AsyncOpenAI  # Annotations only
+
+# .env file in project root, loaded before the first client is created
 # The .env file should contain: OPENAI_API_KEY=your_api_key_here
 env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(env_path)
 
-def summarize(raw_text: str, title_guess: str = "Untitled") -> dict:
+# Completion settings shared by every summary request (single, async, and batched)
+SUMMARY_MODEL = "gpt-4o-mini"      # Fast and cost-effective model
+SUMMARY_TEMPERATURE = 0.7          # Balance between creativity and consistency
+SUMMARY_MAX_TOKENS = 300           # Output budget per paper, to control costs
+
+# Semantic summary cache: OpenAI embeddings of past inputs (.npy matrix) plus their summaries (JSONL sidecar)
+# A paper whose text embeds within SEMANTIC_CACHE_THRESHOLD cosine similarity of one already
+# summarized (e.g. the same abstract fetched again) reuses that summary without a chat completion
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_THRESHOLD = 0.95
+# Generative tier for near misses: when the closest cached papers score between SEMANTIC_RELATED_THRESHOLD
+# and SEMANTIC_CACHE_THRESHOLD, up to SEMANTIC_CONTEXT_K of their summaries are sent as context together
+# with a shorter excerpt (SYNTHESIS_INPUT_TOKENS) of the new paper, instead of its full MAX_INPUT_TOKENS
+# Synthesized summaries are never cached, so only full-text summaries are ever used as that context
+SEMANTIC_RELATED_THRESHOLD = 0.80
+SEMANTIC_CONTEXT_K = 3
+SYNTHESIS_INPUT_TOKENS = 1500
+_SUMMARY_CACHE_DIR = Path.home() / '.cache' / 'agentic_ai' / 'workflow_summaries'
+# On disk the cache only ever grows by appends (see nn_mode/_semantic_cache.py): rows go to a raw
+# float16 journal next to the compacted .npy matrix, folded into it every SEMANTIC_COMPACT_ROWS rows
+# float16 keeps ~3 significant digits: cosine scores move by ~1e-3, well inside the thresholds
+SEMANTIC_COMPACT_ROWS = 256
+_semantic_cache = SemanticStore(
+    _SUMMARY_CACHE_DIR / 'semantic_embeddings.npy',
+    _SUMMARY_CACHE_DIR / 'semantic_embeddings.f16',    # Rows appended since the last compaction
+    _SUMMARY_CACHE_DIR / 'semantic_summaries.jsonl',   # {title, summary}, one per row
+    dtype=np.float16,
+    compact_rows=SEMANTIC_COMPACT_ROWS,
+)
+
+# Exact-match response cache on disk, keyed by the prompt's blake2b digest, so a restarted
+# run doesn't pay again for papers it already summarized (opened on first use)
+_RESPONSE_CACHE_DIR = _SUMMARY_CACHE_DIR / 'responses'
+RESPONSE_CACHE_TTL = 30 * 86400   # Bound staleness: prompts or models change over a month
+_response_cache = None
+
+# Cache entries are orjson bytes compressed with zstd level 3, or zlib without the optional zstandard
+# package; the zstd frame magic tells the two apart on read
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Static instructions, sent as an identical system message on every call so they form a
+# byte-stable prefix for OpenAI's server-side prompt cache; the paper goes in the user message after it
+_SYSTEM_PROMPT = (
+    "Summarize the following AI paper for a busy Junior AI Intern. "
+    "Use EXACTLY this structure with these exact headers:\n\n"
+    "**Problem:** [description]\n"        # What problem does the paper address?
+    "**Approach:** [description]\n"        # How did they solve it?
+    "**Key Results:** [description]\n"     # What did they find?
+    "**Why It Matters:** [description]\n\n"  # Why is this important?
+    "Keep each section to 30-50 words. Total 120–180 words."
+)
+
+# Per-paper user message: only the dynamic content
+_PROMPT_TEMPLATE = "Title: {title}\n\n{text}"
+
+# Digest of everything static in a summary request, computed once at import: it keys the prompt
+# hashes, so only the per-paper user message is hashed per call, yet editing the instructions or
+# switching model starts a fresh disk cache instead of serving summaries made under the old prompt
+_PROMPT_KEY = hashlib.blake2b(
+    f"{SUMMARY_MODEL}\n{SUMMARY_TEMPERATURE}\n{SUMMARY_MAX_TOKENS}\n{_SYSTEM_PROMPT}".encode("utf-8"),
+    digest_size=32
+).digest()
+
+# summarize_batch(): several papers per request, answered as one JSON object
+# The model fills the same four sections per paper; they are rendered back into summarize()'s markdown format
+_BATCH_SYSTEM_PROMPT = (
+    "You summarize AI papers for a busy Junior AI Intern. The user sends a JSON array of papers, "
+    "each with an id, title, and text. Reply with a JSON object of the form "
+    '{"summaries": [{"id": <paper id>, "problem": "...", "approach": "...", '
+    '"key_results": "...", "why_it_matters": "..."}]} containing exactly one entry per paper. '
+    "Keep each field to 30-50 words (120-180 words per paper)."
+)
+_BATCH_SECTIONS = (
+    ("problem", "Problem"),
+    ("approach", "Approach"),
+    ("key_results", "Key Results"),
+    ("why_it_matters", "Why It Matters"),
+)
+BATCH_MAX_INPUT_TOKENS = 100_000   # Upper bound on paper text per batched request
+
+# Splits a summary into its "**Header:** body" sections (each body runs to the next header line or the end;
+# only spaces are skipped after a header, so an empty section can't swallow the next header)
+_SECTION_RE = re.compile(r'\*\*(Problem|Approach|Key Results|Why It Matters):\*\*[ \t]*(.*?)(?=\n\*\*|$)', re.DOTALL)
+
+# Papers whose cleaned text is shorter than this (empty pages, failed extractions) aren't sent to the
+# model: the text itself is returned as the summary, and short_inputs_skipped counts how often that happens
+MIN_SUMMARY_CHARS = 400
+short_inputs_skipped = 0
+_short_inputs_lock = threading.Lock()   # summarize() threads and summarize_many() tasks all bump the counter
+
+# In-process memo of summarize() results, keyed on the prompt's 32-char digest (not the prompt and
+# paper text themselves) and evicted least-recently-used once it holds SUMMARY_MEMO_SIZE results
+SUMMARY_MEMO_SIZE = 512
+_summary_memo = OrderedDict()
+_summary_memo_lock = threading.Lock()
+
+# Paper text sent to the model is capped by tokens, not characters: LaTeX/code-heavy text
+# packs far fewer characters per token than prose, so a character cap over- or under-shoots
+MAX_INPUT_TOKENS = 3500
+_MAX_CHARS_PER_TOKEN = 10   # Generous bound, used to avoid tokenizing megabytes of page text
+_encoder = None
+
+
+# Boilerplate stripped before truncation so the token budget goes to paper content
+_ARXIV_ID_RE = re.compile(r'arXiv:\d+\.\d+(?:v\d+)?')   # "arXiv:2405.12345v2" stamps
+_PAGE_NUM_RE = re.compile(r'Page \d+ of \d+')            # Page footers
+_SHINGLE = 5           # Words per phrase when looking for repeated headers/footers
+_SHINGLE_MAX_REPEATS = 3   # A phrase seen more often than this is boilerplate: only its first copy is kept
+
+
+def _clean(raw_text: str) -> str:
+    """
+    Strip boilerplate from paper text: arXiv ID stamps, page footers, repeated phrases, extra whitespace.
+    
+    Args:
+        raw_text (str): Paper text
+        
+    Returns:
+        str: Cleaned text with single spaces between words
+    """
+    # Only the part that can survive truncation is worth cleaning
+    text = raw_text[:MAX_INPUT_TOKENS * _MAX_CHARS_PER_TOKEN]
+    text = _PAGE_NUM_RE.sub(' ', _ARXIV_ID_RE.sub(' ', text))
+    words = text.split()  # Also collapses every whitespace run
+    
+    # Count each 5-word phrase; running headers/footers repeat far more than real sentences do
+    counts = Counter(zip(*(words[i:] for i in range(_SHINGLE))))
+    if not counts or max(counts.values()) <= _SHINGLE_MAX_REPEATS:
+        return ' '.join(words)
+    
+    # Keep the first copy of each over-repeated phrase and skip the later ones
+    kept = []
+    seen = set()
+    i = 0
+    while i < len(words):
+        phrase = tuple(words[i:i + _SHINGLE])
+        if counts.get(phrase, 0) > _SHINGLE_MAX_REPEATS:
+            if phrase in seen:
+                i += _SHINGLE
+                continue
+            seen.add(phrase)
+        kept.append(words[i])
+        i += 1
+    return ' '.join(kept)
+
+
+@dataclass(slots=True, frozen=True)
+class SummaryResult:
+    """One paper's summary plus the token usage it cost."""
+    title: str
+    summary: str
+    tokens_in: int
+    tokens_out: int
+    # Header -> text, e.g. {"Problem": "..."}; empty on errors. A read-only mapping, since memoized
+    # results are handed to every caller with the same prompt
+    sections: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    
+    def to_dict(self) -> dict:
+        """Plain dict (sections copied to a dict) for JSON boundaries (persist(), the disk cache)."""
+        return {
+            "title": self.title,
+            "summary": self.summary,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "sections": dict(self.sections),
+        }
+
+
+def _result(title: str, summary: str, tokens_in: int, tokens_out: int) -> SummaryResult:
+    """Build a result, splitting the summary into its sections once here so callers don't re-parse it."""
+    sections = {header: body.strip() for header, body in _SECTION_RE.findall(summary)}
+    return SummaryResult(title, summary, tokens_in, tokens_out, MappingProxyType(sections))
+
+
+def _pack(result: SummaryResult) -> bytes:
+    """Encode a result for the disk cache: orjson, then compressed."""
+    payload = orjson.dumps(result.to_dict())
+    if zstandard is not None:
+        # A compressor per call: zstandard compressors aren't safe to share across threads
+        return zstandard.ZstdCompressor(level=3).compress(payload)
+    return zlib.compress(payload, 6)
+
+
+def _cached_result(cached: bytes) -> SummaryResult:
+    """Rebuild a result from its disk cache entry (see _pack(); sections are re-derived)."""
+    if cached.startswith(_ZSTD_MAGIC):
+        payload = zstandard.ZstdDecompressor().decompress(cached)
+    else:
+        payload = zlib.decompress(cached)
+    cached = orjson.loads(payload)
+    return _result(cached["title"], cached["summary"], cached["tokens_in"], cached["tokens_out"])
+
+
+def _short_input_result(title: str, text: str):
+    """Result for text too short to be worth a completion (MIN_SUMMARY_CHARS), else None."""
+    global short_inputs_skipped
+    if len(text) >= MIN_SUMMARY_CHARS:
+        return None
+    with _short_inputs_lock:
+        short_inputs_skipped += 1
+    return SummaryResult(title, text or "(empty paper)", 0, 0)
+
+
+def _error_result(title: str, error) -> SummaryResult:
+    """Result for a paper that could not be summarized (no tokens charged)."""
+    return SummaryResult(title, "Error summarizing: " + str(error), 0, 0)
+
+
+def _get_encoder():
+    """Lazy load the gpt-4o-mini tokenizer (only load once; the first load reads the BPE ranks file)."""
+    global _encoder
+    if _encoder is None:
+        import tiktoken
+        _encoder = tiktoken.encoding_for_model("gpt-4o-mini")
+    return _encoder
+
+
+def _truncate(raw_text: str, max_tokens: int = MAX_INPUT_TOKENS) -> str:
+    """
+    Cut text to at most max_tokens tokens, ending on a sentence boundary when one is near.
+    
+    Args:
+        raw_text (str): Paper text
+        max_tokens (int): Token budget. Default: MAX_INPUT_TOKENS
+        
+    Returns:
+        str: The text, unchanged if it already fits
+    """
+    enc = _get_encoder()
+    tokens = enc.encode(raw_text[:max_tokens * _MAX_CHARS_PER_TOKEN], disallowed_special=())
+    if len(tokens) <= max_tokens and len(raw_text) <= max_tokens * _MAX_CHARS_PER_TOKEN:
+        return raw_text
+    
+    text = enc.decode(tokens[:max_tokens])
+    # Back off to the last full sentence rather than feed the model half of one,
+    # unless that would throw away more than a tenth of the budget
+    cut = text.rfind('. ')
+    if cut >= len(text) * 0.9:
+        text = text[:cut + 1]
+    return text
+
+
+@functools.cache
+def _load_env():
+    """Load environment variables from the project .env file (only once)."""
+    from dotenv import load_dotenv
+    load_dotenv(env_path)
+
+
+@functools.cache
+def _http_settings() -> tuple:
+    """
+    Connection pool limits and timeouts for api.openai.com (built once, on first client).
+    
+    A handful of warm keep-alive sockets (kept for a minute between papers) instead of the
+    SDK defaults, and a short connect timeout so a dead network fails fast.
+    
+    Returns:
+        tuple: (httpx.Limits, httpx.Timeout)
+    """
+    import httpx
+    limits = httpx.Limits(max_keepalive_connections=8, max_connections=32, keepalive_expiry=60.0)
+    return limits, httpx.Timeout(30.0, connect=5.0)
+
+
+@functools.cache
+def _get_client() -> "OpenAI":
+    """
+    Create the shared OpenAI client on first use (one connection pool, so keep-alive
+    connections are reused across papers).
+    
+    Raises:
+        ValueError: If OPENAI_API_KEY is not found in environment variables (nothing is cached then)
+    """
+    import httpx
+    from openai import OpenAI
+    
+    # Retrieve API key from environment variables and validate that it exists
+    _load_env()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment or .env file")
+    # Retries come from _llm_retry
+    limits, timeout = _http_settings()
+    return OpenAI(api_key=api_key, http_client=httpx.Client(limits=limits), timeout=timeout, max_retries=0)
+
+
+# AsyncOpenAI clients by event loop: the client's connection pool is bound to the loop that created it,
+# so each asyncio.run() gets its own client (reused by every summarize_async() call on that loop)
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _new_async_client() -> "AsyncOpenAI":
+    """
+    Create an AsyncOpenAI client bound to the running event loop.
+    
+    Raises:
+        ValueError: If OPENAI_API_KEY is not found in environment variables
+    """
+    import httpx
+    from openai import AsyncOpenAI
+    
+    _load_env()
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not found in environment or .env file")
+    
+    # httpx's async pool loses throughput as concurrent requests pile up; the aiohttp transport
+    # scales with summarize_many()'s concurrency. Without the aiohttp extra, fall back to httpx
+    # with the same pool limits as the sync client (older SDKs don't export DefaultAioHttpClient at all).
+    limits, timeout = _http_settings()
+    try:
+        from openai import DefaultAioHttpClient  # aiohttp transport needs the openai[aiohttp] extra
+        http_client = DefaultAioHttpClient()
+    except (ImportError, RuntimeError):
+        http_client = httpx.AsyncClient(limits=limits)
+    return AsyncOpenAI(api_key=api_key, http_client=http_client, timeout=timeout, max_retries=0)
+
+
+def _get_async_client() -> "AsyncOpenAI":
+    """Lazy create the shared AsyncOpenAI client for the running event loop (only create once per loop)."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = _new_async_client()
+    return client
+
+
+def _embed(client: "OpenAI", text: str) -> np.ndarray:
+    """Embed text with EMBEDDING_MODEL and L2-normalize it (so dot product = cosine similarity)."""
+    response = client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+    return _normalized(response.data[0].embedding)
+
+
+async def _embed_async(client: "AsyncOpenAI", text: str) -> np.ndarray:
+    """Async version of _embed()."""
+    response = await client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+    return _normalized(response.data[0].embedding)
+
+
+def _normalized(values: list) -> np.ndarray:
+    """Embedding values as an L2-normalized float32 vector."""
+    embedding = np.asarray(values, dtype=np.float32)
+    return embedding / np.linalg.norm(embedding)
+
+
+def _messages(prompt: str) -> list:
+    """Chat messages for one paper: the shared system instructions, then the paper."""
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _is_transient(error: BaseException) -> bool:
+    """True for OpenAI errors worth retrying: rate limits, dropped connections/timeouts, server-side 5xx."""
+    import openai  # Already loaded by the time a request has failed
+    return isinstance(error, (
+        openai.RateLimitError,
+        openai.APIConnectionError,   # Includes APITimeoutError
+        openai.InternalServerError,
+    ))
+
+
+# Retry policy for chat completions: exponential backoff with jitter, only on transient errors;
+# auth and bad-request errors fail immediately
+_llm_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential_jitter(initial=0.5, max=8),
+    retry=retry_if_exception(_is_transient),
+    reraise=True,  # Surface the last OpenAI error instead of tenacity's RetryError
+)
+
+
+@_llm_retry
+def _complete(client: "OpenAI", prompt: str) -> tuple:
+    """
+    Stream one summary completion and assemble it.
+    
+    Streaming delivers the first tokens as soon as they are generated, and include_usage
+    adds a final chunk (with no choices) carrying the token counts.
+    
+    Returns:
+        tuple: (summary, tokens_in, tokens_out)
+    """
+    stream = client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=_messages(prompt),       # Static system instructions, then the paper
+        temperature=SUMMARY_TEMPERATURE,
+        max_tokens=SUMMARY_MAX_TOKENS,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    parts = []
+    usage = None
+    for chunk in stream:
+        if chunk.choices:
+            parts.append(chunk.choices[0].delta.content or "")
+        if chunk.usage is not None:
+            usage = chunk.usage
+    return _streamed_result(parts, usage)
+
+
+@_llm_retry
+async def _complete_async(client: "AsyncOpenAI", prompt: str) -> tuple:
+    """Async version of _complete()."""
+    stream = await client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=_messages(prompt),
+        temperature=SUMMARY_TEMPERATURE,
+        max_tokens=SUMMARY_MAX_TOKENS,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    parts = []
+    usage = None
+    async for chunk in stream:
+        if chunk.choices:
+            parts.append(chunk.choices[0].delta.content or "")
+        if chunk.usage is not None:
+            usage = chunk.usage
+    return _streamed_result(parts, usage)
+
+
+def _streamed_result(parts: list, usage) -> tuple:
+    """(summary, tokens_in, tokens_out) from streamed text pieces and the final usage chunk."""
+    summary = "".join(parts).strip()
+    if usage is None:
+        return summary, 0, 0  # Endpoint ignored stream_options: the text is complete, the counts unknown
+    # Token usage for cost tracking and monitoring (prompt = input, completion = output)
+    return summary, usage.prompt_tokens, usage.completion_tokens
+
+
+@_llm_retry
+def _complete_batch(client: "OpenAI", content: str, n_papers: int):
+    """Request summaries for a JSON array of papers in one JSON-mode completion (retried like _complete())."""
+    return client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": _BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": content},
+        ],
+        temperature=SUMMARY_TEMPERATURE,
+        max_tokens=SUMMARY_MAX_TOKENS * n_papers,    # Same per-paper output budget as summarize()
+        response_format={"type": "json_object"}
+    )
+
+
+def _build_prompt(raw_text: str, title_guess: str) -> tuple:
+    """
+    Build the user message (title + text) for one paper; instructions are in _SYSTEM_PROMPT.
+    
+    Returns:
+        tuple: (prompt, truncated paper text)
+    """
+    text = _truncate(_clean(raw_text))  # Drop boilerplate, then cap at MAX_INPUT_TOKENS tokens for cost control
+    
+    # _SYSTEM_PROMPT instructs the LLM on:
+    # - Target audience (busy Junior AI Intern)
+    # - Required structure (specific headers)
+    # - Format requirements (markdown with bold headers)
+    # - Length constraints (30-50 words per section, 120-180 total)
+    return _PROMPT_TEMPLATE.format(title=title_guess, text=text), text
+
+
+def _get_response_cache() -> diskcache.Cache:
+    """Lazy open the on-disk response cache (only open once)."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = diskcache.Cache(str(_RESPONSE_CACHE_DIR))
+    return _response_cache
+
+
+def _cache_get(prompt_hash: str):
+    """Cached result for a prompt, or None (also for entries this install can't decode or read)."""
+    try:
+        cached = _get_response_cache().get(prompt_hash)
+        if cached is None:
+            return None
+        return _cached_result(cached)
+    except Exception:
+        # e.g. a zstd entry without zstandard installed, or a locked/corrupt cache file: summarize again
+        return None
+
+
+def _cache_set(prompt_hash: str, result: SummaryResult):
+    """Store a fresh result in the disk cache for RESPONSE_CACHE_TTL (failures are logged and skipped)."""
+    try:
+        _get_response_cache().set(prompt_hash, _pack(result), expire=RESPONSE_CACHE_TTL)
+    except Exception as e:
+        # The response cache is only an optimization: never lose a paid completion over it
+        print(f"[WARN] Response cache store failed, skipping it: {e}")
+
+
+def _prompt_hash(prompt: str) -> str:
+    """blake2b digest of a prompt (keyed by _PROMPT_KEY): the key for both the in-process memo and the disk cache."""
+    return hashlib.blake2b(prompt.encode("utf-8"), digest_size=16, key=_PROMPT_KEY).hexdigest()
+
+
+def _semantic_lookup(embedding: np.ndarray) -> tuple:
+    """
+    Find cached papers similar to `embedding`.
+    
+    Returns:
+        tuple: (hit, related) - hit is the closest entry if it clears SEMANTIC_CACHE_THRESHOLD, else None;
+               related lists up to SEMANTIC_CONTEXT_K entries (closest first) scoring at least
+               SEMANTIC_RELATED_THRESHOLD when there is no hit (both empty if the cache can't be read)
+    """
+    with _semantic_cache.lock:
+        # The semantic cache is an optimization: a corrupt or mismatched cache is treated as a miss
+        try:
+            matrix, entries = _semantic_cache.load()
+            if not entries:
+                return None, []
+            # One matrix-vector product scores every cached paper at once
+            sims = matrix @ embedding
+            top = np.argsort(sims)[::-1][:SEMANTIC_CONTEXT_K]
+            if sims[top[0]] >= SEMANTIC_CACHE_THRESHOLD:
+                return entries[top[0]], []
+            return None, [entries[i] for i in top if sims[i] >= SEMANTIC_RELATED_THRESHOLD]
+        except Exception as e:
+            _semantic_cache.reset()  # Reload from disk next time rather than trust a half-loaded cache
+            print(f"[WARN] Semantic cache lookup failed, skipping it: {e}")
+            return None, []
+
+
+def _synthesis_prompt(title_guess: str, text: str, related: list) -> str:
+    """
+    Prompt for a paper close to, but not a copy of, papers already summarized.
+    
+    The related summaries carry much of the context, so only the first SYNTHESIS_INPUT_TOKENS
+    tokens of the paper are sent.
+    
+    Args:
+        title_guess (str): Paper title
+        text (str): Truncated paper text
+        related (list): Semantic cache entries ({title, summary}) of similar papers
+        
+    Returns:
+        str: User message to send after _SYSTEM_PROMPT
+    """
+    examples = "\n\n".join(f"Title: {entry['title']}\n{entry['summary']}" for entry in related)
+    paper = _PROMPT_TEMPLATE.format(title=title_guess, text=_truncate(text, SYNTHESIS_INPUT_TOKENS))
+    return (
+        f"Here are summaries of related papers:\n\n{examples}\n\n"
+        f"Using the same template, summarize this new paper:\n\n{paper}"
+    )
+
+
+def _semantic_store(embedding: np.ndarray, title: str, summary: str):
+    """Add a summary to the semantic cache (never raises: a failed store is logged and skipped)."""
+    _semantic_cache.store(embedding, {"title": title, "summary": summary})
+
+def summarize(raw_text: str, title_guess: str = "Untitled") -> SummaryResult:
     """
     Generate an AI-powered summary of an academic paper.
     
-    Uses OpenAI's GPT-4o-mini model to create a structured, concise summary
+    Uses OpenAI's SUMMARY_MODEL (GPT-4o-mini) to create a structured, concise summary
     formatted for busy AI practitioners. The summary follows a specific template
     with sections for Problem, Approach, Results, and Significance.
     
@@ -35,114 +619,293 @@ def summarize(raw_text: str, title_guess: str = "Untitled") -> dict:
         title_guess (str): Estimated or extracted title of the paper. Default: "Untitled"
         
     Returns:
-        dict: Summary result containing:
+        SummaryResult: Summary result (use .to_dict() for JSON) containing:
             - title (str): Paper title
             - summary (str): LLM-generated structured summary in markdown format
             - tokens_in (int): Number of input tokens used (for cost tracking)
             - tokens_out (int): Number of output tokens used (for cost tracking)
+            - sections (dict): The summary split by header ("Problem", "Approach",
+              "Key Results", "Why It Matters"); headers the model left out are missing
             
     Raises:
         ValueError: If OPENAI_API_KEY is not found in environment variables
         
     Note:
-        The function truncates input text to 6000 characters to manage token costs.
-        It automatically retries once on API failures before giving up.
+        The function truncates input text to MAX_INPUT_TOKENS tokens to manage token costs.
+        Rate limits, connection errors, and 5xx responses are retried up to 5 attempts with
+        exponential backoff; other API errors return an error summary immediately.
+        Identical prompts are answered from an in-process LRU cache and, across restarts, from an
+        on-disk cache kept for RESPONSE_CACHE_TTL (the same result, tokens included).
+        Text shorter than MIN_SUMMARY_CHARS after cleaning is returned as its own summary (or
+        "(empty paper)") without an API call, with tokens_in/tokens_out of 0.
+        Semantic cache hits return the earlier summary with tokens_in/tokens_out of 0; papers that
+        are only related to cached ones are summarized from those summaries plus a shorter excerpt.
     """
     # ================================================
-    # Setup: Load API key and initialize client
+    # Build the summarization prompt
     # ================================================
+    prompt, text = _build_prompt(raw_text, title_guess)
     
-    # Retrieve API key from environment variables
-    api_key = os.getenv("OPENAI_API_KEY")
+    # Nothing worth summarizing (empty or a stub): return the text as-is, no API call (and no key needed)
+    short = _short_input_result(title_guess, text)
+    if short is not None:
+        return short
     
-    # Validate that API key exists
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment or .env file")
+    # ================================================
+    # Setup: Shared client (validates the API key)
+    # ================================================
+    _get_client()
+
+    # ================================================
+    # Summarize (memoized on the prompt in this process and on disk)
+    # ================================================
+    prompt_hash = _prompt_hash(prompt)
+    with _summary_memo_lock:
+        memoized = _summary_memo.get(prompt_hash)
+        if memoized is not None:
+            _summary_memo.move_to_end(prompt_hash)  # Mark as most recently used
+            # Memoized instance returned as-is: its fields can't be reassigned and sections is read-only
+            return memoized
+    
+    try:
+        # The lock isn't held during the API call, so concurrent threads don't queue behind each other
+        result = _summarize_uncached(prompt, title_guess, text, prompt_hash)
+    except Exception as e:
+        # ================================================
+        # Final fallback: Return error message
+        # ================================================
+        # The call failed for good - return an error result rather than crashing (errors are not memoized)
+        return _error_result(title_guess, e)
+    
+    with _summary_memo_lock:
+        _summary_memo[prompt_hash] = result
+        _summary_memo.move_to_end(prompt_hash)
+        if len(_summary_memo) > SUMMARY_MEMO_SIZE:
+            _summary_memo.popitem(last=False)  # Evict the least recently used result
+    return result
+
+
+def _summarize_uncached(prompt: str, title_guess: str, text: str, prompt_hash: str) -> SummaryResult:
+    """
+    Summarize one prompt, checking the disk cache and then the semantic cache first.
     
-    # Initialize OpenAI client with the API key
-    client = OpenAI(api_key=api_key)
+    Not memoized itself: summarize() keeps the in-process memo around this call.
     
+    Args:
+        prompt (str): Full summarization prompt
+        title_guess (str): Paper title
+        text (str): Truncated paper text (embedded for the semantic cache)
+        prompt_hash (str): blake2b digest of prompt, also the disk cache key
+        
+    Returns:
+        SummaryResult: Summary result (see summarize())
+        
+    Raises:
+        Exception: The API error once retries are exhausted or the error isn't transient
+            (so failures are never cached)
+    """
     # ================================================
-    # Build the summarization prompt
+    # Disk cache: an identical prompt summarized by an earlier run
     # ================================================
-    
-    # Construct a detailed prompt that instructs the LLM on:
-    # - Target audience (busy Junior AI Intern)
-    # - Required structure (specific headers)
-    # - Format requirements (markdown with bold headers)
-    # - Length constraints (30-50 words per section, 120-180 total)
-    prompt = (
-        f"Summarize the following AI paper for a busy Junior AI Intern. "
-        f"Use EXACTLY this structure with these exact headers:\n\n"
-        f"**Problem:** [description]\n"        # What problem does the paper address?
-        f"**Approach:** [description]\n"        # How did they solve it?
-        f"**Key Results:** [description]\n"     # What did they find?
-        f"**Why It Matters:** [description]\n\n"  # Why is this important?
-        f"Keep each section to 30-50 words. Total 120–180 words.\n\n"
-        f"Title: {title_guess}\n\n{raw_text[:6000]}"  # Truncate to 6000 chars for token efficiency
-    )
+    cached = _cache_get(prompt_hash)
+    if cached is not None:
+        return cached
+
+    # Shared OpenAI client (created once per process)
+    client = _get_client()
 
     # ================================================
-    # Attempt 1: Primary API call
+    # Semantic cache: reuse the summary of a near-identical paper
     # ================================================
     try:
-        # Make API request to OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",              # Fast and cost-effective model
-            messages=[{"role": "user", "content": prompt}],  # Single user message
-            temperature=0.7,                  # Balance between creativity and consistency
-            max_tokens=300                    # Limit output length to control costs
-        )
-        
-        # Extract the summary text from the response
-        summary = response.choices[0].message.content.strip()
-        
-        # Extract token usage for cost tracking and monitoring
-        tokens_in = response.usage.prompt_tokens   # Tokens in the prompt (input)
-        tokens_out = response.usage.completion_tokens  # Tokens in the completion (output)
-        
-        # Return the result dictionary
-        return {
-            "title": title_guess,
-            "summary": summary,
-            "tokens_in": tokens_in,
-            "tokens_out": tokens_out
-        }
+        embedding = _embed(client, f"{title_guess}\n\n{text}")
+    except Exception:
+        embedding = None  # The cache is an optimization: summarize without it if embedding fails
+    
+    related = []
+    if embedding is not None:
+        hit, related = _semantic_lookup(embedding)
+        if hit is not None:
+            return _result(title_guess, hit["summary"], 0, 0)
+
+    # ================================================
+    # API call (transient errors are retried with backoff inside _complete())
+    # ================================================
+    # A near miss still saves input tokens: related summaries plus a shorter excerpt
+    request = _synthesis_prompt(title_guess, text, related) if related else prompt
+    summary, tokens_in, tokens_out = _complete(client, request)
+    result = _result(title_guess, summary, tokens_in, tokens_out)
+    
+    # Only full-text summaries are persisted: a synthesized one is built from other papers' summaries
+    # and a short excerpt, so caching it would hand it to later exact matches and near misses
+    if not related:
+        if embedding is not None:
+            _semantic_store(embedding, title_guess, summary)  # Remember this summary for near-duplicate papers
+        _cache_set(prompt_hash, result)
+    return result
+
+
+async def summarize_async(raw_text: str, title_guess: str = "Untitled") -> SummaryResult:
+    """
+    Async version of summarize() on a shared AsyncOpenAI client.
+    
+    Same prompt, disk cache, semantic cache, retry, and return value as summarize(); the
+    in-process LRU memo is summarize()-only.
+    
+    Args:
+        raw_text (str): Full text content of the paper to summarize
+        title_guess (str): Estimated or extracted title of the paper. Default: "Untitled"
+        
+    Returns:
+        SummaryResult: Summary result (see summarize())
         
+    Raises:
+        ValueError: If OPENAI_API_KEY is not found in environment variables
+    """
+    # Shared client for this event loop (raises ValueError if OPENAI_API_KEY is missing)
+    return await _summarize_async(_get_async_client, raw_text, title_guess)
+
+
+async def _summarize_async(get_client, raw_text: str, title_guess: str) -> SummaryResult:
+    """
+    summarize_async() with the client supplied by get_client() (summarize_many() brings its own).
+    
+    The client is only requested once the input is known to need the API, so short inputs
+    are answered without an OPENAI_API_KEY.
+    """
+    prompt, text = _build_prompt(raw_text, title_guess)
+    short = _short_input_result(title_guess, text)
+    if short is not None:
+        return short
+    client = get_client()
+    prompt_hash = _prompt_hash(prompt)
+    
+    # Disk cache: an identical prompt summarized by an earlier run (shared with summarize())
+    cached = await asyncio.to_thread(_cache_get, prompt_hash)
+    if cached is not None:
+        return cached
+    
+    # Semantic cache: reuse the summary of a near-identical paper
+    try:
+        embedding = await _embed_async(client, f"{title_guess}\n\n{text}")
+    except Exception:
+        embedding = None
+    
+    related = []
+    if embedding is not None:
+        # The first lookup loads the cache from disk, so keep it off the event loop
+        hit, related = await asyncio.to_thread(_semantic_lookup, embedding)
+        if hit is not None:
+            return _result(title_guess, hit["summary"], 0, 0)
+    
+    # Same policy as summarize(): near misses use the related summaries, backoff retries inside
+    # _complete_async(), then an error result
+    request = _synthesis_prompt(title_guess, text, related) if related else prompt
+    try:
+        summary, tokens_in, tokens_out = await _complete_async(client, request)
     except Exception as e:
-        # ================================================
-        # Attempt 2: Retry on failure
-        # ================================================
-        # Network issues and rate limits are common - retry once before giving up
+        return _error_result(title_guess, e)
+    result = _result(title_guess, summary, tokens_in, tokens_out)
+    
+    # Synthesized summaries (near misses) are not persisted, as in summarize()
+    if not related:
+        if embedding is not None:
+            await asyncio.to_thread(_semantic_store, embedding, title_guess, summary)
+        await asyncio.to_thread(_cache_set, prompt_hash, result)
+    return result
+
+
+async def summarize_many(docs: list, concurrency: int = 20) -> list:
+    """
+    Summarize several documents concurrently.
+    
+    Args:
+        docs (list): Document dicts with "raw_text" and "title" fields (e.g. from fetch())
+        concurrency (int): Maximum number of OpenAI requests in flight at once. Default: 20
+        
+    Returns:
+        list: One SummaryResult per document, in the same order as `docs`
+        
+    Example:
+        summaries = asyncio.run(summarize_many(docs))
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    # A client of its own, closed when the batch is done: batch callers are typically one asyncio.run()
+    # per batch, and closing the loop's shared client instead would cut off any other summarize_async()
+    # or summarize_many() still running on the same loop
+    # Created by the first document that needs the API (none, if every document is too short)
+    client = None
+    
+    def batch_client():
+        nonlocal client
+        if client is None:
+            client = _new_async_client()
+        return client
+    
+    async def bounded(doc):
+        async with semaphore:
+            return await _summarize_async(batch_client, doc["raw_text"], doc.get("title", "Untitled"))
+    
+    try:
+        return await asyncio.gather(*(bounded(doc) for doc in docs))
+    finally:
+        # Release the connections here rather than leaving the aiohttp session reported unclosed at loop shutdown
+        if client is not None:
+            await client.close()
+
+
+def summarize_batch(papers: list, k: int = 8) -> list:
+    """
+    Summarize papers k at a time, each group in a single JSON-mode chat completion.
+    
+    One request per group instead of one per paper saves round-trips and sends the
+    instructions once per group.
+    
+    Args:
+        papers (list): (raw_text, title_guess) tuples
+        k (int): Papers per request, capped so a request's paper text stays under
+            BATCH_MAX_INPUT_TOKENS. Default: 8
+        
+    Returns:
+        list: One SummaryResult per paper, in input order. The request's token usage
+              is split evenly across its papers. Papers the model skipped, or whose request
+              failed, get an "Error summarizing: ..." summary.
+        
+    Raises:
+        ValueError: If OPENAI_API_KEY is not found in environment variables
+    """
+    client = _get_client()
+    k = max(1, min(k, BATCH_MAX_INPUT_TOKENS // MAX_INPUT_TOKENS))
+    
+    results = []
+    for start in range(0, len(papers), k):
+        group = papers[start:start + k]
+        content = orjson.dumps(
+            [{"id": i, "title": title, "text": _truncate(_clean(raw_text))} for i, (raw_text, title) in enumerate(group)]
+        ).decode()
+        
         try:
-            # Make the same request again
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=300
-            )
-            
-            # Extract results
-            summary = response.choices[0].message.content.strip()
-            tokens_in = response.usage.prompt_tokens
-            tokens_out = response.usage.completion_tokens
-            
-            # Return successful result
-            return {
-                "title": title_guess,
-                "summary": summary,
-                "tokens_in": tokens_in,
-                "tokens_out": tokens_out
-            }
-        except:
-            # ================================================
-            # Final fallback: Return error message
-            # ================================================
-            # Both attempts failed - return an error result rather than crashing
-            return {
-                "title": title_guess,
-                "summary": "Error summarizing: " + str(e),
-                "tokens_in": 0,
-                "tokens_out": 0
-            }
\ No newline at end of file
+            response = _complete_batch(client, content, len(group))
+            parsed = orjson.loads(response.choices[0].message.content)
+            by_id = {entry.get("id"): entry for entry in parsed.get("summaries", []) if isinstance(entry, dict)}
+        except Exception as e:
+            results.extend(_error_result(title, e) for _, title in group)
+            continue
+        
+        # Split the request's usage across its papers (remainder on the first) so totals still add up
+        n = len(group)
+        tokens_in = [response.usage.prompt_tokens // n] * n
+        tokens_out = [response.usage.completion_tokens // n] * n
+        tokens_in[0] += response.usage.prompt_tokens % n
+        tokens_out[0] += response.usage.completion_tokens % n
+        
+        for i, (_, title) in enumerate(group):
+            entry = by_id.get(i)
+            if entry is None:
+                results.append(SummaryResult(title, "Error summarizing: missing from batch response",
+                                             tokens_in[i], tokens_out[i]))
+                continue
+            # Render the same markdown structure summarize() asks the model for
+            summary = "\n".join(f"**{label}:** {str(entry.get(key, '')).strip()}" for key, label in _BATCH_SECTIONS)
+            results.append(_result(title, summary, tokens_in[i], tokens_out[i]))
+    return results